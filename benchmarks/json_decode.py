@@ -0,0 +1,74 @@
+"""Decoding cost of the Login, SuccessTask and DoTask response bodies.
+
+Compares the old path (stdlib ``json`` plus ``.get()`` chains) with every
+ResponseDecoder backend that is installed.
+
+Usage: python -m benchmarks.json_decode --iterations 20000
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "benchmark")
+
+import bot.utils  # noqa: E402,F401  (bot.core modules need the logger set up first)
+from bot.core.responses import (  # noqa: E402
+    DoTaskResponse, LoginResponse, ResponseDecoder, SuccessTaskResponse, msgspec, orjson,
+)
+from bot.core.tapper import TASK_IDS  # noqa: E402
+
+BODIES = {
+    LoginResponse: json.dumps({"code": 200, "msg": "ok", "data": {"token": "x" * 180, "user": {"id": 1}}}).encode(),
+    SuccessTaskResponse: json.dumps({"code": 200, "msg": "ok", "data": [
+        {"changeType": num, "money": 100, "createTime": "2024-06-01T00:00:00", "remark": "task"} for num in TASK_IDS
+    ]}).encode(),
+    DoTaskResponse: json.dumps({"code": 200, "data": None, "msg": "ok"}).encode(),
+}
+
+
+def legacy(body: bytes, response_type: type):
+    data = json.loads(body)
+    if response_type is LoginResponse:
+        return data.get("data").get("token")
+    if response_type is SuccessTaskResponse:
+        return {task.get("changeType") for task in data.get("data")}
+    return data.get("code") == 200
+
+
+def measure(decode, iterations: int) -> dict:
+    results = {}
+    for response_type, body in BODIES.items():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            decode(body, response_type)
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        decode(body, response_type)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[response_type.__name__] = {"us_per_op": round(elapsed / iterations * 1e6, 3), "peak_bytes": peak}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {"legacy_json": measure(legacy, args.iterations)}
+    for backend, module in (("json", json), ("orjson", orjson), ("msgspec", msgspec)):
+        if module is None:
+            results[backend] = "not installed"
+            continue
+        results[backend] = measure(ResponseDecoder(backend=backend).decode, args.iterations)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
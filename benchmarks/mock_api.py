@@ -0,0 +1,180 @@
+"""In-process stand-ins for the tonpepes API, the web-app assets and Pyrogram."""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from urllib.parse import quote
+
+from aiohttp import web
+from pyrogram.raw import types
+
+import bot.utils  # noqa: F401  (bot.utils must be initialised before bot.core.tapper)
+from bot.core.sessions import SessionDescriptor
+from bot.core.tapper import TASK_IDS
+
+# Bound at import so the benchmark's --sleep-scale patch of asyncio.sleep leaves simulated latency alone.
+real_sleep = asyncio.sleep
+
+ASSET_BODIES = {
+    '/': b'<!doctype html><html><body><div id="root"></div></body></html>',
+    '/static/js/main.93a8b697.js': b'/* main */' + b'x' * 400_000,
+    '/static/css/main.84f02eae.css': b'/* css */' + b'x' * 20_000,
+    '/static/media/logo.0c61def9ae172064e82fba1985ad2c81.svg': b'<svg></svg>' + b' ' * 5_000,
+    '/Roboto-Blod.ttf': b'\x00' * 150_000,
+}
+
+
+class MockApi:
+    """aiohttp application answering the endpoints Tapper calls.
+
+    ``latency`` adds a fixed per-request delay in seconds; ``completed``
+    is the fraction of tasks SuccessTask reports as already done.
+    """
+
+    def __init__(self, latency: float = 0.0, completed: float = 0.0):
+        self.latency = latency
+        self.completed = completed
+        self.requests = 0
+        self.bytes_sent = 0
+        self._runner: web.AppRunner | None = None
+        self.url = None
+
+    async def _delay(self) -> None:
+        self.requests += 1
+        if self.latency:
+            await real_sleep(self.latency)
+
+    def _json(self, data) -> web.Response:
+        body = json.dumps(data).encode()
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type='application/json')
+
+    async def login(self, request: web.Request) -> web.Response:
+        await self._delay()
+        if request.method == 'OPTIONS':
+            return web.Response(status=204)
+        payload = await request.json()
+        token = hashlib.sha1(str(payload.get('initData')).encode()).hexdigest()
+        return self._json({"code": 200, "data": {"token": token}})
+
+    async def success_task(self, request: web.Request) -> web.Response:
+        await self._delay()
+        done = [{"changeType": num, "money": 100} for num in TASK_IDS if random.random() < self.completed]
+        return self._json({"code": 200, "data": done})
+
+    async def do_task(self, request: web.Request) -> web.Response:
+        await self._delay()
+        return self._json({"code": 200, "data": None, "msg": "ok"})
+
+    async def login_award(self, request: web.Request) -> web.Response:
+        await self._delay()
+        return self._json({"code": 200, "data": None})
+
+    async def ip(self, request: web.Request) -> web.Response:
+        await self._delay()
+        return self._json({"origin": request.remote})
+
+    async def asset(self, request: web.Request) -> web.Response:
+        await self._delay()
+        body = ASSET_BODIES.get(request.path)
+        if body is None:
+            raise web.HTTPNotFound()
+
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+
+        self.bytes_sent += len(body)
+        return web.Response(body=body, headers={'ETag': etag})
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('OPTIONS', '/api/User/Login', self.login)
+        app.router.add_post('/api/User/Login', self.login)
+        app.router.add_get('/api/User/SuccessTask', self.success_task)
+        app.router.add_post('/api/User/DoTask/{num}', self.do_task)
+        app.router.add_get('/api/User/LoginAward1/{num}', self.login_award)
+        app.router.add_get('/ip', self.ip)
+        app.router.add_get('/{path:.*}', self.asset)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.application(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class FakeUser:
+    def __init__(self, user_id: int, first_name: str):
+        self.id = user_id
+        self.first_name = first_name
+        self.last_name = ''
+        self.username = f"user{user_id}"
+
+
+class FakeWebView:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeClient:
+    """Pyrogram Client stand-in returning canned profiles and WebView URLs."""
+
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.proxy = None
+        self.is_connected = False
+        self.user = FakeUser(user_id=abs(hash(name)) % 10 ** 9, first_name=f"PEPES{name}")
+
+    async def _rpc(self) -> None:
+        if self.latency:
+            await real_sleep(self.latency)
+
+    async def connect(self) -> None:
+        await self._rpc()
+        self.is_connected = True
+
+    async def disconnect(self) -> None:
+        self.is_connected = False
+
+    async def get_me(self) -> FakeUser:
+        await self._rpc()
+        return self.user
+
+    async def update_profile(self, first_name: str | None = None, **kwargs) -> bool:
+        await self._rpc()
+        if first_name is not None:
+            self.user.first_name = first_name
+        return True
+
+    async def resolve_peer(self, peer_id) -> types.InputPeerUser:
+        await self._rpc()
+        return types.InputPeerUser(user_id=7392018078, access_hash=1234567890)
+
+    async def invoke(self, query) -> FakeWebView:
+        await self._rpc()
+        user = json.dumps({"id": self.user.id, "first_name": self.user.first_name, "username": self.user.username})
+        init_data = f"query_id=AAF{self.user.id}&user={quote(user)}&auth_date={int(time.time())}&hash=0f0f0f"
+        return FakeWebView(url=f"https://tg.tonpepes.xyz/#tgWebAppData={quote(init_data)}&tgWebAppVersion=7.6")
+
+
+class FakeSession(SessionDescriptor):
+    __slots__ = ("rpc_latency",)
+
+    def __init__(self, name: str, proxy: str | None = None, rpc_latency: float = 0.0):
+        super().__init__(name=name, proxy=proxy)
+        self.rpc_latency = rpc_latency
+
+    def create_client(self) -> FakeClient:
+        return FakeClient(name=self.name, latency=self.rpc_latency)
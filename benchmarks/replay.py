@@ -0,0 +1,73 @@
+"""Replay server for traffic captured with HTTP_RECORD_FILE.
+
+Responses are keyed by method and path (with query string) and handed out
+round-robin, so any number of synthetic sessions can run against a capture
+from a few real ones. Each response waits for its recorded latency times
+``latency_scale`` before it is sent.
+"""
+import itertools
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+from benchmarks.mock_api import real_sleep
+from bot.core.recording import load_records
+
+# Recorded bodies are already decoded and re-framed by aiohttp on the way out.
+SKIP_HEADERS = frozenset({"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive",
+                          "date", "server"})
+
+
+def _key(method: str, url: str) -> tuple[str, str]:
+    parts = urlsplit(url)
+    return method.upper(), parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class ReplayApi:
+    def __init__(self, file_names: list[str], latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+        self.requests = 0
+        self.misses = 0
+        self.bytes_sent = 0
+        self._runner: web.AppRunner | None = None
+        self.url = None
+
+        recorded: dict[tuple[str, str], list[dict]] = {}
+        for file_name in file_names:
+            for record in load_records(file_name):
+                record["headers"] = [(key, value) for key, value in record["headers"]
+                                     if key.lower() not in SKIP_HEADERS]
+                recorded.setdefault(_key(record["method"], record["url"]), []).append(record)
+        self.records = sum(len(records) for records in recorded.values())
+        self._responses = {key: itertools.cycle(records) for key, records in recorded.items()}
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        responses = self._responses.get(_key(request.method, str(request.rel_url)))
+        if responses is None:
+            self.misses += 1
+            raise web.HTTPNotFound()
+
+        record = next(responses)
+        if self.latency_scale:
+            await real_sleep(record["latency"] * self.latency_scale)
+
+        self.bytes_sent += len(record["body"])
+        return web.Response(status=record["status"], body=record["body"] or None, headers=record["headers"])
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,115 @@
+"""Startup cost: importing the bot and building the session list for many session files.
+
+The import report runs ``python -X importtime`` on the launcher in a fresh
+interpreter and checks the total against ``--import-budget-ms``.
+
+Usage: python -m benchmarks.startup --sessions 5000
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "benchmark")
+
+from pyrogram import Client  # noqa: E402
+
+from bot.config import settings  # noqa: E402
+from bot.core.sessions import SessionDescriptor  # noqa: E402
+
+
+def eager_clients(workdir: str, names: list[str]) -> list[Client]:
+    return [
+        Client(
+            name=name,
+            api_id=settings.API_ID,
+            api_hash=settings.API_HASH,
+            workdir=workdir,
+            plugins=dict(root="bot/plugins"),
+        )
+        for name in names
+    ]
+
+
+def lazy_descriptors(workdir: str, names: list[str]) -> list[SessionDescriptor]:
+    return [SessionDescriptor(name=name, workdir=workdir) for name in names]
+
+
+def measure(build, workdir: str) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    names = sorted(os.path.splitext(os.path.basename(file))[0]
+                   for file in glob.glob(os.path.join(workdir, "*.session")))
+    items = build(workdir, names)
+
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"sessions": len(items), "seconds": round(elapsed, 4), "peak_kib": peak // 1024}
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("pyrogram", "aiocfscrape", "js2py", "better_proxy", "aiohttp_proxy")
+
+
+def import_time(module: str, budget_ms: float) -> dict:
+    code = (f"import sys, {module}; "
+            f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (ROOT, os.environ.get("PYTHONPATH")))))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=workdir, env=env,
+                                capture_output=True, text=True, check=True)
+        wall = time.perf_counter() - started
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((name[1:].rstrip(), int(own), int(cumulative)))
+
+    total_us = sum(cumulative for name, _, cumulative in entries if not name.startswith(" "))
+    heaviest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:10]
+
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "wall_ms": round(wall * 1000, 1),
+        "budget_ms": budget_ms,
+        "within_budget": total_us / 1000 <= budget_ms,
+        "eagerly_loaded": [name for name in result.stdout.strip().split(",") if name],
+        "heaviest_self_ms": {name.strip(): round(own / 1000, 1) for name, own, _ in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--import-budget-ms", type=float, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for i in range(args.sessions):
+            open(os.path.join(workdir, f"session_{i:05d}.session"), "w").close()
+
+        results = {
+            "import_time": import_time("bot.utils.launcher", budget_ms=args.import_budget_ms),
+            "eager_clients": measure(eager_clients, workdir),
+            "lazy_descriptors": measure(lazy_descriptors, workdir),
+        }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Full Tapper cycle against the in-process mock API.
+
+Runs one cycle for N synthetic sessions through the scheduler and prints
+(or writes) a JSON report so results can be compared across commits.
+
+Usage: python -m benchmarks.tapper_cycle --sessions 200 --concurrency 50 --output bench.json
+
+--record captures the run's traffic; --replay serves a capture (from here
+or from the bot with HTTP_RECORD_FILE set) instead of the mock API.
+
+Exits non-zero when peak open file descriptors exceed a budget that depends
+on the connector limit only, so socket use that grows with --sessions fails.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "benchmark")
+
+from loguru import logger as loguru_logger  # noqa: E402
+
+from benchmarks.mock_api import FakeSession, MockApi  # noqa: E402
+from benchmarks.replay import ReplayApi  # noqa: E402
+from bot.config import settings  # noqa: E402
+from bot.core import proxies, ratelimit, recording, tapper  # noqa: E402
+from bot.core.connections import ConnectorPool  # noqa: E402
+from bot.core.scheduler import Scheduler  # noqa: E402
+
+BENCH_PROXY = "http://127.0.0.1:9"
+# Log sinks, state.db and its WAL, the listening socket and other per-process descriptors.
+FD_SLACK = 32
+
+
+class DirectConnectorPool(ConnectorPool):
+    """Ignores the synthetic proxy so traffic goes straight to the mock API."""
+
+    def _create(self, proxy):
+        return super()._create(None)
+
+
+def scale_sleeps(scale: float) -> None:
+    original_sleep = asyncio.sleep
+
+    async def sleep(delay, result=None):
+        return await original_sleep(delay * scale, result)
+
+    asyncio.sleep = sleep
+
+
+def open_fds() -> int | None:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(args) -> dict:
+    if args.replay:
+        api = ReplayApi(file_names=args.replay, latency_scale=args.replay_latency_scale)
+    else:
+        api = MockApi(latency=args.latency / 1000, completed=args.completed)
+    url = await api.start()
+    recording.recorder.file_name = args.record or ""
+
+    settings.API_URL = url
+    settings.WEBAPP_URL = url
+    settings.PROXY_CHECK_URL = f"{url}/ip"
+    tapper.connector_pool = DirectConnectorPool(
+        limit=settings.CONNECTOR_LIMIT,
+        limit_per_host=settings.CONNECTOR_LIMIT_PER_HOST,
+        keepalive_timeout=settings.CONNECTOR_KEEPALIVE_TIMEOUT,
+        idle_timeout=settings.CONNECTOR_IDLE_TIMEOUT,
+    )
+    proxies.connector_pool = tapper.connector_pool
+    ratelimit.rate_limiter.rate = args.rate_limit
+    ratelimit.rate_limiter.overrides = {}
+
+    latencies = []
+    failures = 0
+    peak_fds = baseline_fds = open_fds()
+    # Every pooled connection holds a client and a server socket, both in this process.
+    fd_budget = baseline_fds + 2 * settings.CONNECTOR_LIMIT + FD_SLACK if baseline_fds is not None else None
+
+    async def run_session(session: FakeSession) -> None:
+        nonlocal failures
+        started = time.perf_counter()
+        next_run = await tapper.run_tapper(session=session)
+        latencies.append(time.perf_counter() - started)
+        if next_run is None or next_run < 24 * 60 * 60:
+            failures += 1
+
+    async def sample_fds() -> None:
+        nonlocal peak_fds
+        while True:
+            fds = open_fds()
+            if fds is not None:
+                peak_fds = max(peak_fds or 0, fds)
+            await asyncio.sleep(0.05 / args.sleep_scale if args.sleep_scale else 0.05)
+
+    scheduler = Scheduler(runner=run_session, max_concurrent=args.concurrency)
+    for i in range(args.sessions):
+        scheduler.schedule(FakeSession(name=f"bench_{i:05d}", proxy=BENCH_PROXY, rpc_latency=args.rpc_latency / 1000))
+
+    sampler = asyncio.create_task(sample_fds())
+    started = time.perf_counter()
+    await scheduler.run()
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    await tapper.connector_pool.close()
+    await tapper.client_pool.close()
+    await api.stop()
+    recording.recorder.flush()
+
+    return {
+        "python": sys.version.split()[0],
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "sleep_scale": args.sleep_scale,
+        "rate_limit": args.rate_limit,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(args.sessions / elapsed, 2) if elapsed else None,
+        "cycle_p50_s": round(percentile(latencies, 50), 4) if latencies else None,
+        "cycle_p99_s": round(percentile(latencies, 99), 4) if latencies else None,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "peak_open_fds": peak_fds,
+        "fd_budget": fd_budget,
+        "mock_requests": api.requests,
+        "mock_bytes_sent": api.bytes_sent,
+        "replay_misses": api.misses if args.replay else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=settings.MAX_CONCURRENT_SESSIONS)
+    parser.add_argument("--sleep-scale", type=float, default=0.001, help="Multiplier applied to every asyncio.sleep")
+    parser.add_argument("--latency", type=float, default=0, help="Mock API latency per request, ms")
+    parser.add_argument("--rpc-latency", type=float, default=0, help="Fake Telegram RPC latency, ms")
+    parser.add_argument("--completed", type=float, default=0, help="Fraction of tasks already completed")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Requests/s per host and endpoint, 0 disables (limiter sleeps are scaled too)")
+    parser.add_argument("--record", help="Capture the run's HTTP traffic to this file (gzip JSON lines)")
+    parser.add_argument("--replay", nargs="+", help="Serve captured traffic instead of the mock API")
+    parser.add_argument("--replay-latency-scale", type=float, default=1.0,
+                        help="Multiplier for recorded latencies when replaying")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the bot's log output")
+    args = parser.parse_args()
+    # The run happens in a temporary directory.
+    args.record = args.record and os.path.abspath(args.record)
+    args.replay = args.replay and [os.path.abspath(file_name) for file_name in args.replay]
+
+    if not args.verbose:
+        loguru_logger.remove()
+
+    scale_sleeps(args.sleep_scale)
+
+    revision = git_revision()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            report = {"revision": revision, **asyncio.run(run_benchmark(args))}
+        finally:
+            os.chdir(cwd)
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+    if report["fd_budget"] is not None and report["peak_open_fds"] > report["fd_budget"]:
+        sys.exit(f"Peak open file descriptors {report['peak_open_fds']} exceed the budget of {report['fd_budget']}; "
+                 f"connections are not being shared between sessions")
+
+
+if __name__ == "__main__":
+    main()
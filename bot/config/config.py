@@ -17,6 +17,64 @@ class Settings(BaseSettings):
     DELETE_TOMATO: bool = False
     ADD_TOMATO: bool = True
 
+    API_URL: str = 'https://api.tonpepes.xyz'
+    WEBAPP_URL: str = 'https://tg.tonpepes.xyz'
+    PROXY_CHECK_URL: str = 'https://httpbin.org/ip'
+    PROXY_CHECK_TIMEOUT: float = 5
+    PROXY_CHECK_TTL: int = 600
+    PROXY_CHECK_CONCURRENCY: int = 20
+
+    TG_WEB_DATA_TTL: int = 3600
+    TG_MAX_CONNECTED: int = 20
+    TG_IDLE_TIMEOUT: float = 600
+    TG_RPC_RATE: float = 10
+    TG_RPC_DC_RATE: float = 5
+    TG_RPC_BURST: float = 5
+    TG_FLOOD_SLEEP_THRESHOLD: float = 5
+
+    SESSION_AUTH_CHECK: bool = False
+    SESSION_AUTH_CONCURRENCY: int = 5
+    SESSION_AUTH_TTL: int = 24 * 60 * 60
+
+    TOKEN_REFRESH_MARGIN: int = 300
+    TOKEN_DEFAULT_TTL: int = 3600
+
+    WORKERS: int = 1
+    MAX_CONCURRENT_SESSIONS: int = 50
+    START_DELAY: list[int] = [0, 15]
+    RETRY_DELAY: list[int] = [300, 600]
+
+    TASK_CONCURRENCY: int = 5
+
+    JSON_DECODER: str = 'auto'
+
+    HTTP_RETRY_ATTEMPTS: int = 5
+    HTTP_RETRY_BASE_DELAY: float = 1
+    HTTP_RETRY_MAX_DELAY: float = 30
+    HTTP_RETRY_DEADLINE: float = 120
+    HTTP_MAX_BODY_SIZE: int = 1024 * 1024
+    HTTP_RECORD_FILE: str = ''
+
+    RATE_LIMIT: float = 20
+    RATE_LIMIT_BURST: float = 10
+    RATE_LIMIT_MIN: float = 0.5
+    RATE_LIMIT_ERROR_BURST: int = 3
+    RATE_LIMIT_OVERRIDES: dict[str, float] = {'User/Login': 5}
+
+    LOG_FORMAT: str = 'console'
+    LOG_LEVEL: str = 'INFO'
+    LOG_ENQUEUE: bool = True
+
+    METRICS_HOST: str = '127.0.0.1'
+    METRICS_PORT: int = 0
+    METRICS_FILE: str = ''
+    METRICS_INTERVAL: int = 60
+
+    CONNECTOR_LIMIT: int = 100
+    CONNECTOR_LIMIT_PER_HOST: int = 20
+    CONNECTOR_KEEPALIVE_TIMEOUT: float = 30
+    CONNECTOR_IDLE_TIMEOUT: float = 300
+
 settings = Settings()
 
 
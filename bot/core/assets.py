@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+from .helper import atomic_json_update
+from .ratelimit import rate_limiter
+from .recording import recorder
+from .responses import buffer_response
+
+ASSETS_CACHE_FILE = "assets_cache.json"
+
+WEBAPP_ASSETS = (
+    '/',
+    '/static/js/main.93a8b697.js',
+    '/static/css/main.84f02eae.css',
+    '/static/media/logo.0c61def9ae172064e82fba1985ad2c81.svg',
+    '/Roboto-Blod.ttf',
+)
+
+
+class AssetCache:
+    """Shared ETag/Last-Modified validators for the web app's static assets.
+
+    Bodies are not kept (nothing reads them); the validators let every
+    session revalidate with a conditional GET and get a 304 back when the
+    asset has not changed.
+    """
+
+    def __init__(self, file_name: str = ASSETS_CACHE_FILE):
+        self.file_name = file_name
+        self._validators: dict[str, dict[str, str]] | None = None
+
+    @property
+    def validators(self) -> dict[str, dict[str, str]]:
+        if self._validators is None:
+            self._validators = self._load()
+        return self._validators
+
+    def _load(self) -> dict[str, dict[str, str]]:
+        try:
+            with open(self.file_name, 'r') as cache_file:
+                validators = json.load(cache_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return validators if isinstance(validators, dict) else {}
+
+    def _save(self, url: str) -> None:
+        def merge(validators):
+            # Other worker processes may have stored validators for other assets since we loaded the file.
+            validators = validators if isinstance(validators, dict) else {}
+            validators[url] = self.validators[url]
+            self.validators.update(validators)
+            return validators
+
+        atomic_json_update(self.file_name, merge)
+
+    def _conditional_headers(self, url: str, headers=None) -> dict[str, str]:
+        cached = self.validators.get(url, {})
+        headers = dict(headers or {})
+        if 'etag' in cached:
+            headers['If-None-Match'] = cached['etag']
+        if 'last_modified' in cached:
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    async def fetch(self, http_client: aiohttp.ClientSession, url: str, headers=None, session_name: str = "") -> int:
+        # Assets come in a burst right before Login, so they take tokens from the shared limiter as well.
+        bucket = await rate_limiter.acquire(url, 'asset')
+        with metrics.timer('http', 'asset') as timer:
+            try:
+                resp = await http_client.get(url, headers=self._conditional_headers(url, headers), ssl=False)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                rate_limiter.feedback(bucket, 'asset', None)
+                raise
+            rate_limiter.feedback(bucket, 'asset', resp.status)
+            timer.status = resp.status
+            resp = await buffer_response(resp, max_size=settings.HTTP_MAX_BODY_SIZE, discard=not recorder.enabled)
+            resp.latency = time.perf_counter() - timer.started
+
+        if recorder.enabled:
+            recorder.record(session_name, 'asset', 'GET', url, resp.status, resp.headers, resp.body,
+                            latency=resp.latency)
+
+        if resp.status == 200:
+            cached = {}
+            if resp.headers.get('ETag'):
+                cached['etag'] = resp.headers['ETag']
+            if resp.headers.get('Last-Modified'):
+                cached['last_modified'] = resp.headers['Last-Modified']
+
+            if cached and self.validators.get(url) != cached:
+                self.validators[url] = cached
+                self._save(url)
+
+        return resp.status
+
+    async def prefetch(self, http_client: aiohttp.ClientSession, urls=None, headers=None,
+                       session_name: str = "") -> list[int | BaseException]:
+        if urls is None:
+            urls = [f"{settings.WEBAPP_URL}{path}" for path in WEBAPP_ASSETS]
+        urls = list(dict.fromkeys(urls))
+
+        results = await asyncio.gather(*(self.fetch(http_client=http_client, url=url, headers=headers,
+                                                    session_name=session_name)
+                                         for url in urls), return_exceptions=True)
+
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                logger.debug(f"Asset prefetch failed {url}: {result}")
+
+        return results
+
+
+asset_cache = AssetCache()
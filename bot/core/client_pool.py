@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+from bot.config import settings
+from bot.exceptions import RescheduleSession
+from bot.utils.metrics import metrics
+from .sessions import SessionDescriptor
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+
+
+class ClientPool:
+    """Keeps up to ``max_connected`` Pyrogram clients connected between cycles.
+
+    Clients are reused per session name. When the ceiling is reached the
+    least recently used idle client is disconnected to make room; if every
+    connected client is busy, callers wait for one to be released. A timer
+    armed on release disconnects clients idle for ``idle_timeout`` seconds.
+    """
+
+    def __init__(self, max_connected: int, idle_timeout: float):
+        self.max_connected = max(1, max_connected)
+        self.idle_timeout = idle_timeout
+
+        self._clients: OrderedDict[str, "Client"] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._busy: set[str] = set()
+        self._condition: asyncio.Condition | None = None
+        self._sweep_handle: asyncio.TimerHandle | None = None
+        self._sweep_task: asyncio.Task | None = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def _pop(self, name: str) -> "Client":
+        """Take ``name`` out of the pool; it stays busy until ``_disconnect`` has closed it."""
+        client = self._clients.pop(name)
+        self._last_used.pop(name, None)
+        self._busy.add(name)
+        return client
+
+    @staticmethod
+    async def _close(client: "Client | None") -> None:
+        if client is not None and client.is_connected:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+
+    async def _disconnect(self, clients: dict[str, "Client"]) -> None:
+        """Close popped clients without holding the lock, then free their names."""
+        if not clients:
+            return
+
+        try:
+            await asyncio.gather(*(self._close(client) for client in clients.values()))
+        finally:
+            async with self.condition:
+                self._busy.difference_update(clients)
+                self.condition.notify_all()
+
+    def _pop_idle(self) -> dict[str, "Client"]:
+        now = time.monotonic()
+        return {name: self._pop(name) for name in [
+            name for name in self._clients
+            if name not in self._busy and now - self._last_used.get(name, now) >= self.idle_timeout]}
+
+    def _arm_sweep(self) -> None:
+        """Schedule a sweep for when the oldest idle client expires, unless one is already pending."""
+        if self._sweep_handle is not None:
+            return
+
+        idle_since = [last_used for name, last_used in self._last_used.items() if name not in self._busy]
+        if not idle_since:
+            return
+
+        delay = max(0.0, min(idle_since) + self.idle_timeout - time.monotonic())
+        self._sweep_handle = asyncio.get_running_loop().call_later(delay, self._start_sweep)
+
+    def _start_sweep(self) -> None:
+        self._sweep_handle = None
+        self._sweep_task = asyncio.ensure_future(self._sweep())
+
+    async def _sweep(self) -> None:
+        async with self.condition:
+            idle = self._pop_idle()
+        await self._disconnect(idle)
+        self._arm_sweep()
+
+    async def _reserve(self, session: SessionDescriptor, proxy: dict | None) -> "Client":
+        # Disconnecting takes a network round trip, so victims are only picked under the lock.
+        victims = {}
+        stale = None
+        try:
+            async with self.condition:
+                victims.update(self._pop_idle())
+
+                while True:
+                    if session.name in self._busy and session.name not in victims:
+                        await self.condition.wait()
+                    elif session.name in self._clients or len(self._clients) < self.max_connected:
+                        break
+                    else:
+                        idle = next((name for name in self._clients if name not in self._busy), None)
+                        if idle is not None:
+                            victims[idle] = self._pop(idle)
+                        else:
+                            await self.condition.wait()
+
+                # Our own idle-expired client: the name stays busy for the replacement.
+                stale = victims.pop(session.name, None)
+                client = self._clients.get(session.name)
+                if client is None:
+                    client = self._clients[session.name] = session.create_client()
+
+                client.proxy = proxy
+                self._clients.move_to_end(session.name)
+                self._busy.add(session.name)
+        finally:
+            # The stale client is closed before its replacement connects to the same session file.
+            await asyncio.gather(self._disconnect(victims), self._close(stale))
+
+        return client
+
+    async def _release(self, name: str, drop: bool) -> None:
+        dropped = {}
+        async with self.condition:
+            if drop and name in self._clients:
+                dropped[name] = self._pop(name)
+            else:
+                self._busy.discard(name)
+                if name in self._clients:
+                    self._last_used[name] = time.monotonic()
+                    self._arm_sweep()
+                self.condition.notify_all()
+        await self._disconnect(dropped)
+
+    @asynccontextmanager
+    async def connection(self, session: SessionDescriptor, proxy: dict | None = None):
+        client = await self._reserve(session=session, proxy=proxy)
+
+        drop = True
+        try:
+            if not client.is_connected:
+                with metrics.timer('telegram', 'connect'):
+                    await client.connect()
+            drop = False
+            yield client
+        except RescheduleSession:
+            # The session is only paused; its connection is still good.
+            raise
+        except BaseException:
+            drop = True
+            raise
+        finally:
+            await self._release(name=session.name, drop=drop)
+
+    async def close(self) -> None:
+        if self._sweep_handle is not None:
+            self._sweep_handle.cancel()
+            self._sweep_handle = None
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+
+        await self._disconnect({name: self._pop(name) for name in list(self._clients)})
+        self._busy.clear()
+
+
+client_pool = ClientPool(max_connected=settings.TG_MAX_CONNECTED, idle_timeout=settings.TG_IDLE_TIMEOUT)
@@ -0,0 +1,37 @@
+import aiohttp
+
+from bot.utils import logger
+from .responses import BufferedResponse
+
+CHALLENGE_STATUSES = frozenset({403, 429, 503})
+
+
+def may_be_challenge(resp: aiohttp.ClientResponse | BufferedResponse) -> bool:
+    """Cheap header-only test; such responses keep their body so ``is_challenge`` can look at it."""
+    return resp.status in CHALLENGE_STATUSES and resp.headers.get('Server', '').startswith('cloudflare')
+
+
+def is_challenge(resp: BufferedResponse) -> bool:
+    return may_be_challenge(resp) and (b'jschl_vc' in resp.body and b'jschl_answer' in resp.body
+                                       or b'/cdn-cgi/l/chk_captcha' in resp.body)
+
+
+async def solve(http_client: aiohttp.ClientSession, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+    """Repeat a challenged request through CloudflareScraper.
+
+    aiocfscrape pulls in the Js2Py engine, which is by far the slowest import
+    in the bot, so it is only loaded once a challenge actually shows up. The
+    scraper shares the client's connector and cookie jar, so the clearance
+    cookie it earns is used by the following plain requests.
+    """
+    from aiocfscrape import CloudflareScraper
+
+    logger.info(f"Cloudflare challenge on {url}, solving")
+    # The scraper's own follow-up requests need the session's headers, so they become its defaults.
+    scraper = CloudflareScraper(headers=kwargs.pop('headers', None), connector=http_client.connector,
+                                connector_owner=False, cookie_jar=http_client.cookie_jar)
+    try:
+        return await scraper.request(method, url, **kwargs)
+    finally:
+        # Closing a session that does not own its connector or cookie jar leaves both untouched.
+        await scraper.close()
@@ -0,0 +1,77 @@
+import time
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+from bot.config import settings
+
+
+class ConnectorPool:
+    """Shares one keep-alive connector per proxy URL between sessions.
+
+    Sessions still get their own ``ClientSession`` (cookie jar, headers) but
+    borrow the connector, so TCP/TLS connections to the same host through the
+    same proxy are reused. Connectors nobody borrows for ``idle_timeout``
+    seconds are closed on the next acquire.
+    """
+
+    def __init__(self, limit: int, limit_per_host: int, keepalive_timeout: float, idle_timeout: float):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.idle_timeout = idle_timeout
+
+        self._connectors: dict[str | None, aiohttp.BaseConnector] = {}
+        self._users: dict[str | None, int] = {}
+        self._last_used: dict[str | None, float] = {}
+
+    def _create(self, proxy: str | None) -> aiohttp.BaseConnector:
+        kwargs = dict(limit=self.limit, limit_per_host=self.limit_per_host,
+                      keepalive_timeout=self.keepalive_timeout)
+        if proxy:
+            from aiohttp_proxy import ProxyConnector
+
+            return ProxyConnector.from_url(proxy, **kwargs)
+        return aiohttp.TCPConnector(**kwargs)
+
+    async def _evict_idle(self) -> None:
+        now = time.monotonic()
+        idle = [key for key, last_used in self._last_used.items()
+                if not self._users.get(key) and now - last_used > self.idle_timeout]
+
+        for key in idle:
+            connector = self._connectors.pop(key)
+            self._users.pop(key, None)
+            self._last_used.pop(key, None)
+            await connector.close()
+
+    @asynccontextmanager
+    async def connector(self, proxy: str | None):
+        await self._evict_idle()
+
+        connector = self._connectors.get(proxy)
+        if connector is None or connector.closed:
+            connector = self._connectors[proxy] = self._create(proxy)
+
+        self._users[proxy] = self._users.get(proxy, 0) + 1
+        try:
+            yield connector
+        finally:
+            self._users[proxy] -= 1
+            self._last_used[proxy] = time.monotonic()
+
+    async def close(self) -> None:
+        for connector in self._connectors.values():
+            await connector.close()
+
+        self._connectors.clear()
+        self._users.clear()
+        self._last_used.clear()
+
+
+connector_pool = ConnectorPool(
+    limit=settings.CONNECTOR_LIMIT,
+    limit_per_host=settings.CONNECTOR_LIMIT_PER_HOST,
+    keepalive_timeout=settings.CONNECTOR_KEEPALIVE_TIMEOUT,
+    idle_timeout=settings.CONNECTOR_IDLE_TIMEOUT,
+)
@@ -1,4 +1,8 @@
-headers = {
+from types import MappingProxyType
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+headers = MappingProxyType({
     'Accept': 'application/json, text/plain, */*',
     'Accept-Language': 'ru-RU,ru;q=0.9',
     'Connection': 'keep-alive',
@@ -11,4 +15,16 @@ headers = {
     'Sec-Ch-Ua-Mobile': '?1',
     'Sec-Ch-Ua-Platform': 'Android',
     'X-Requested-With': 'org.telegram.messenger',
-}
+})
+
+
+def build_headers(user_agent: str) -> CIMultiDictProxy:
+    session_headers = CIMultiDict(headers)
+    session_headers['User-Agent'] = user_agent
+    return CIMultiDictProxy(session_headers)
+
+
+def with_authorization(session_headers: CIMultiDictProxy, access_token: str) -> CIMultiDictProxy:
+    authorized = CIMultiDict(session_headers)
+    authorized['Authorization'] = f"Bearer {access_token}"
+    return CIMultiDictProxy(authorized)
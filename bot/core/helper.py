@@ -1,5 +1,57 @@
+import json
+import os
+from contextlib import contextmanager
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
 def format_duration(seconds):
     hours = seconds // 3600
     minutes = (seconds % 3600) // 60
     remaining_seconds = seconds % 60
     return f"{hours} hours, {minutes} mins, {remaining_seconds} secs"
+
+
+@contextmanager
+def file_lock(file_name: str):
+    """Exclusive inter-process lock held on ``<file_name>.lock``."""
+    with open(f"{file_name}.lock", 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_json_update(file_name: str, merge: Callable[[Any], Any], indent: int | None = None) -> None:
+    """Read-modify-write ``file_name`` under ``file_lock`` so concurrent worker processes don't lose entries.
+
+    ``merge`` gets the JSON currently on disk (``None`` if missing or corrupted)
+    and returns what to write; the result replaces the file atomically.
+    """
+    with file_lock(file_name):
+        try:
+            with open(file_name, 'r') as file:
+                on_disk = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            on_disk = None
+
+        data = merge(on_disk)
+
+        tmp_file_name = f"{file_name}.{os.getpid()}.tmp"
+        with open(tmp_file_name, 'w') as file:
+            json.dump(data, file, indent=indent)
+        os.replace(tmp_file_name, file_name)
@@ -0,0 +1,166 @@
+import asyncio
+import heapq
+import time
+from typing import Iterator
+
+import aiohttp
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+from .connections import connector_pool
+from .ratelimit import rate_limiter
+from .recording import recorder
+from .responses import buffer_response
+
+PROXIES_FILE = "bot/config/proxies.txt"
+
+
+def iter_proxies(file_name: str = PROXIES_FILE) -> Iterator[str]:
+    """Yield proxy URLs line by line, skipping blanks, comments, duplicates and unparsable rows."""
+    from better_proxy import Proxy
+
+    seen = set()
+    with open(file=file_name, encoding="utf-8-sig") as file:
+        for line_number, row in enumerate(file, start=1):
+            row = row.strip()
+            if not row or row.startswith("#"):
+                continue
+
+            try:
+                proxy = Proxy.from_str(proxy=row).as_url
+            except Exception as error:
+                logger.warning(f"{file_name}:{line_number} | Skipping invalid proxy: {error}")
+                continue
+
+            if proxy not in seen:
+                seen.add(proxy)
+                yield proxy
+
+
+class ProxyHealth:
+    __slots__ = ("ip", "latency", "checks", "failures", "checked_at")
+
+    def __init__(self):
+        self.ip = None
+        self.latency = None
+        self.checks = 0
+        self.failures = 0
+        self.checked_at = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return self.latency is not None
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.checks if self.checks else 0.0
+
+    @property
+    def cost(self) -> float:
+        """Expected seconds per successful request; lower is better."""
+        if not self.alive:
+            return float("inf")
+        return self.latency / max(1.0 - self.failure_rate, 0.05)
+
+
+class ProxyManager:
+    """Checks each distinct proxy once, caches the result for ``ttl`` and hands out the healthiest ones.
+
+    Concurrent ``check`` calls for the same proxy share one request, so
+    sessions behind a common proxy no longer each hit the check URL.
+    """
+
+    def __init__(self, timeout: float, ttl: float, concurrency: int):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.health: dict[str, ProxyHealth] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def _probe(self, proxy: str, health: ProxyHealth) -> ProxyHealth:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore, connector_pool.connector(proxy) as connector:
+            bucket = await rate_limiter.acquire(settings.PROXY_CHECK_URL, 'check_proxy')
+            started = time.perf_counter()
+            try:
+                async with aiohttp.ClientSession(connector=connector, connector_owner=False) as http_client:
+                    with metrics.timer('http', 'check_proxy') as timer:
+                        response = await http_client.get(settings.PROXY_CHECK_URL,
+                                                         timeout=aiohttp.ClientTimeout(self.timeout))
+                        # Transport errors here are the proxy's, not the check host's, so only statuses count.
+                        rate_limiter.feedback(bucket, 'check_proxy', response.status)
+                        timer.status = response.status
+                        response = await buffer_response(response, max_size=settings.HTTP_MAX_BODY_SIZE)
+
+                    if recorder.enabled:
+                        recorder.record("", 'check_proxy', 'GET', settings.PROXY_CHECK_URL, response.status,
+                                        response.headers, response.body, latency=time.perf_counter() - started)
+                    response.raise_for_status()
+                    health.ip = (await response.json()).get('origin')
+                health.latency = time.perf_counter() - started
+            except Exception as error:
+                health.latency = None
+                health.failures += 1
+                logger.warning(f"Proxy: {proxy} | Check failed: {error or type(error).__name__}")
+
+        health.checks += 1
+        health.checked_at = time.monotonic()
+        return health
+
+    async def check(self, proxy: str) -> ProxyHealth:
+        health = self.health.get(proxy)
+        if health is None:
+            health = self.health[proxy] = ProxyHealth()
+        elif health.checks and time.monotonic() - health.checked_at < self.ttl:
+            return health
+
+        task = self._pending.get(proxy)
+        if task is None:
+            task = self._pending[proxy] = asyncio.ensure_future(self._probe(proxy, health))
+            task.add_done_callback(lambda _: self._pending.pop(proxy, None))
+        return await asyncio.shield(task)
+
+    async def check_all(self, proxies: list[str]) -> dict[str, ProxyHealth]:
+        await asyncio.gather(*(self.check(proxy) for proxy in proxies))
+        return {proxy: self.health[proxy] for proxy in proxies}
+
+    def report(self, proxy: str, ok: bool) -> None:
+        """Fold the outcome of real traffic through ``proxy`` into its failure rate."""
+        health = self.health.get(proxy)
+        if health is not None:
+            health.checks += 1
+            health.failures += not ok
+
+    async def assign(self, session_names: list[str], proxies: list[str]) -> dict[str, str | None]:
+        """Spread sessions over proxies so each gets a share proportional to its measured throughput."""
+        if not proxies:
+            return dict.fromkeys(session_names)
+
+        health = await self.check_all(proxies)
+        candidates = [proxy for proxy in proxies if health[proxy].alive]
+        if not candidates:
+            logger.warning("No proxy passed the health check, assigning round-robin")
+            return {name: proxies[i % len(proxies)] for i, name in enumerate(session_names)}
+
+        # Greedy: each session goes to the proxy whose cost after one more session is lowest.
+        heap = [(health[proxy].cost, index, proxy, 1) for index, proxy in enumerate(candidates)]
+        heapq.heapify(heap)
+        assignment = {}
+        for name in session_names:
+            _, index, proxy, load = heapq.heappop(heap)
+            assignment[name] = proxy
+            heapq.heappush(heap, (health[proxy].cost * (load + 1), index, proxy, load + 1))
+
+        dead = len(proxies) - len(candidates)
+        logger.info(f"Assigned {len(session_names)} sessions to {len(candidates)} healthy proxies"
+                    + (f" | {dead} failed the check" if dead else ""))
+
+        return assignment
+
+
+proxy_manager = ProxyManager(timeout=settings.PROXY_CHECK_TIMEOUT, ttl=settings.PROXY_CHECK_TTL,
+                             concurrency=settings.PROXY_CHECK_CONCURRENCY)
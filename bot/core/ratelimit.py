@@ -0,0 +1,117 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+THROTTLE_STATUSES = frozenset({429, 500, 502, 503, 504, 520, 521, 522, 524})
+DECREASE_FACTOR = 0.5
+ERROR_WINDOW = 5.0
+
+
+class TokenBucket:
+    """Token bucket that hands out send slots in arrival order.
+
+    ``acquire`` reserves a token immediately and sleeps off any deficit, so
+    waiters are spaced ``1 / rate`` apart instead of waking together.
+    The rate halves after ``error_burst`` throttling responses within
+    ``ERROR_WINDOW`` seconds and creeps back by 1% of the ceiling per success.
+    """
+
+    __slots__ = ("rate", "max_rate", "min_rate", "capacity", "tokens", "updated", "error_burst", "errors",
+                 "errors_since")
+
+    def __init__(self, rate: float, capacity: float, min_rate: float, error_burst: int):
+        self.rate = self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.error_burst = max(1, error_burst)
+        self.errors = 0
+        self.errors_since = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def feedback(self, status: int | None) -> bool:
+        """Adjust the rate from a response status (``None`` for a transport error); True if it shrank."""
+        if status is not None and status not in THROTTLE_STATUSES:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+            return False
+
+        now = time.monotonic()
+        if now - self.errors_since > ERROR_WINDOW:
+            self.errors, self.errors_since = 0, now
+        self.errors += 1
+        if self.errors < self.error_burst:
+            return False
+
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+        self.errors, self.errors_since = 0, now
+        return True
+
+
+class RateLimiter:
+    """Shared token buckets keyed by upstream host and endpoint."""
+
+    def __init__(self, rate: float, burst: float, min_rate: float, error_burst: int,
+                 overrides: dict[str, float] | None = None):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.error_burst = error_burst
+        self.overrides = overrides or {}
+        self.share = 1.0
+        self.buckets: dict[tuple[str, str], TokenBucket | None] = {}
+
+    def set_share(self, share: float) -> None:
+        """Scale every limit, e.g. to ``1 / workers`` when several processes share the upstream."""
+        self.share = share
+        self.buckets.clear()
+
+    def bucket(self, url: str, endpoint: str) -> TokenBucket | None:
+        key = (urlsplit(url).netloc, endpoint)
+        try:
+            return self.buckets[key]
+        except KeyError:
+            pass
+
+        rate = self.overrides.get(endpoint, self.rate) * self.share
+        bucket = self.buckets[key] = TokenBucket(
+            rate=rate, capacity=self.burst * self.share, min_rate=self.min_rate * self.share,
+            error_burst=self.error_burst,
+        ) if rate > 0 else None
+        return bucket
+
+    async def acquire(self, url: str, endpoint: str) -> TokenBucket | None:
+        bucket = self.bucket(url, endpoint)
+        if bucket is not None:
+            started = time.perf_counter()
+            await bucket.acquire()
+            metrics.observe('ratelimit', endpoint, time.perf_counter() - started)
+        return bucket
+
+    def feedback(self, bucket: TokenBucket | None, endpoint: str, status: int | None) -> None:
+        if bucket is not None and bucket.feedback(status):
+            logger.warning(f"Rate limiter | {endpoint} throttled upstream, "
+                           f"slowing to {bucket.rate:.2f} req/s")
+
+
+rate_limiter = RateLimiter(
+    rate=settings.RATE_LIMIT,
+    burst=settings.RATE_LIMIT_BURST,
+    min_rate=settings.RATE_LIMIT_MIN,
+    error_burst=settings.RATE_LIMIT_ERROR_BURST,
+    overrides=settings.RATE_LIMIT_OVERRIDES,
+)
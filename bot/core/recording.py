@@ -0,0 +1,62 @@
+import base64
+import gzip
+import json
+import time
+from typing import Iterator
+
+from bot.config import settings
+
+FLUSH_EVERY = 200
+
+
+class TrafficRecorder:
+    """Appends every Tapper HTTP exchange, asset fetches and proxy checks included, to a gzip JSON-lines file.
+
+    Each line holds the request method and URL plus the response status,
+    headers, body and latency. Request bodies and headers are not kept, but
+    response bodies are, including Login tokens, so treat captures as secrets.
+    """
+
+    def __init__(self, file_name: str = ""):
+        self.file_name = file_name
+        self._lines: list[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.file_name)
+
+    def record(self, session_name: str, endpoint: str, method: str, url: str, status: int, headers,
+               body: bytes, latency: float) -> None:
+        self._lines.append(json.dumps({
+            "ts": round(time.time(), 3),
+            "session": session_name,
+            "endpoint": endpoint,
+            "method": method,
+            "url": str(url),
+            "status": status,
+            "headers": [[key, value] for key, value in headers.items()],
+            "body": base64.b64encode(body).decode(),
+            "latency": round(latency, 6),
+        }, separators=(",", ":")) + "\n")
+
+        if len(self._lines) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._lines:
+            return
+        # Every flush appends a new gzip member; gzip readers treat the concatenation as one stream.
+        with gzip.open(self.file_name, "at", encoding="utf-8") as file:
+            file.writelines(self._lines)
+        self._lines.clear()
+
+
+def load_records(file_name: str) -> Iterator[dict]:
+    with gzip.open(file_name, "rt", encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            record["body"] = base64.b64decode(record["body"])
+            yield record
+
+
+recorder = TrafficRecorder(file_name=settings.HTTP_RECORD_FILE)
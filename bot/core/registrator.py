@@ -1,10 +1,12 @@
-from pyrogram import Client
-
 from bot.config import settings
 from bot.utils import logger
+from .sessions import SessionDescriptor
+from .validation import record_session
 
 
 async def register_sessions() -> None:
+    from pyrogram import Client
+
     API_ID = settings.API_ID
     API_HASH = settings.API_HASH
 
@@ -26,4 +28,6 @@ async def register_sessions() -> None:
     async with session:
         user_data = await session.get_me()
 
+    record_session(session_name, SessionDescriptor(name=session_name).path, authorized=True)
+
     logger.success(f'Session added successfully @{user_data.username} | {user_data.first_name} {user_data.last_name}')
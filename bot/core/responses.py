@@ -0,0 +1,194 @@
+import json
+
+import aiohttp
+
+from bot.config import settings
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseTooLarge(aiohttp.ClientPayloadError):
+    pass
+
+
+class BufferedResponse:
+    """Status, headers and body of a response whose connection is already back in the pool."""
+
+    __slots__ = ("method", "url", "status", "reason", "headers", "charset", "request_info", "history", "body",
+                 "latency")
+
+    def __init__(self, resp: aiohttp.ClientResponse, body: bytes):
+        self.method = resp.method
+        self.url = resp.url
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.charset = resp.charset
+        self.request_info = resp.request_info
+        self.history = resp.history
+        self.body = body
+        # Seconds from sending the request to the end of the body, set by whoever timed it.
+        self.latency = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(self.request_info, self.history, status=self.status,
+                                              message=self.reason or "", headers=self.headers)
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self, encoding: str | None = None) -> str:
+        return self.body.decode(encoding or self.charset or "utf-8")
+
+    async def json(self, loads=json.loads, **kwargs):
+        return loads(self.body) if self.body.strip() else None
+
+    def release(self) -> None:
+        pass
+
+
+async def buffer_response(resp: aiohttp.ClientResponse, max_size: int, discard: bool = False) -> BufferedResponse:
+    """Read at most ``max_size`` bytes of ``resp`` and release it; ``discard`` drains the body without keeping it.
+
+    Oversized bodies raise ResponseTooLarge and close the connection instead
+    of returning it to the pool half-read.
+    """
+    try:
+        if resp.content_length is not None and resp.content_length > max_size:
+            raise ResponseTooLarge(f"{resp.method} {resp.url} body of {resp.content_length} bytes exceeds {max_size}")
+
+        if resp.content.is_eof():
+            # Already complete in the buffer (small bodies) or read upstream by CloudflareScraper.
+            body = await resp.read()
+            if len(body) > max_size:
+                raise ResponseTooLarge(f"{resp.method} {resp.url} body exceeds {max_size} bytes")
+            return BufferedResponse(resp, b"" if discard else body)
+
+        chunks = []
+        size = 0
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise ResponseTooLarge(f"{resp.method} {resp.url} body exceeds {max_size} bytes")
+            if not discard:
+                chunks.append(chunk)
+
+        return BufferedResponse(resp, b"".join(chunks))
+    except BaseException:
+        resp.close()
+        raise
+    finally:
+        resp.release()
+
+
+class LoginResponse:
+    __slots__ = ("code", "token")
+
+    def __init__(self, code: int | None, token: str | None):
+        self.code = code
+        self.token = token
+
+    @classmethod
+    def from_obj(cls, obj: dict) -> "LoginResponse":
+        data = obj.get("data") or {}
+        return cls(code=obj.get("code"), token=data.get("token"))
+
+
+class SuccessTaskResponse:
+    __slots__ = ("code", "completed")
+
+    def __init__(self, code: int | None, completed: set[int]):
+        self.code = code
+        self.completed = completed
+
+    @classmethod
+    def from_obj(cls, obj: dict) -> "SuccessTaskResponse":
+        completed = {task.get("changeType") for task in obj.get("data") or ()}
+        completed.discard(None)
+        return cls(code=obj.get("code"), completed=completed)
+
+
+class DoTaskResponse:
+    __slots__ = ("code",)
+
+    def __init__(self, code: int | None):
+        self.code = code
+
+    @classmethod
+    def from_obj(cls, obj: dict) -> "DoTaskResponse":
+        return cls(code=obj.get("code"))
+
+
+if msgspec is not None:
+    # Structs name only the fields we read; msgspec skips the rest without building dicts.
+    class _LoginData(msgspec.Struct):
+        token: str | None = None
+
+    class _Login(msgspec.Struct):
+        code: int | None = None
+        data: _LoginData | None = None
+
+    class _Task(msgspec.Struct):
+        changeType: int | None = None
+
+    class _SuccessTask(msgspec.Struct):
+        code: int | None = None
+        data: list[_Task] | None = None
+
+    class _DoTask(msgspec.Struct):
+        code: int | None = None
+
+    _STRUCT_DECODERS = {
+        LoginResponse: (msgspec.json.Decoder(_Login),
+                        lambda body: LoginResponse(body.code, body.data.token if body.data else None)),
+        SuccessTaskResponse: (msgspec.json.Decoder(_SuccessTask),
+                              lambda body: SuccessTaskResponse(body.code, {task.changeType for task in body.data or ()
+                                                                           if task.changeType is not None})),
+        DoTaskResponse: (msgspec.json.Decoder(_DoTask), lambda body: DoTaskResponse(body.code)),
+    }
+
+
+def resolve_backend(name: str) -> str:
+    if name == "auto":
+        return "msgspec" if msgspec is not None else "orjson" if orjson is not None else "json"
+    if name == "msgspec" and msgspec is None or name == "orjson" and orjson is None:
+        raise ValueError(f"JSON_DECODER={name} but {name} is not installed")
+    if name not in ("msgspec", "orjson", "json"):
+        raise ValueError(f"Unknown JSON_DECODER: {name}")
+    return name
+
+
+class ResponseDecoder:
+    """Decodes raw response bodies into the slotted response types above."""
+
+    def __init__(self, backend: str = "auto"):
+        self.backend = resolve_backend(backend)
+        self.loads = orjson.loads if self.backend == "orjson" else json.loads
+
+    def decode(self, body: bytes, response_type: type):
+        if self.backend == "msgspec":
+            decoder, convert = _STRUCT_DECODERS[response_type]
+            return convert(decoder.decode(body))
+        return response_type.from_obj(self.loads(body))
+
+    async def read(self, resp: BufferedResponse | aiohttp.ClientResponse, response_type: type):
+        return self.decode(await resp.read(), response_type)
+
+
+response_decoder = ResponseDecoder(backend=settings.JSON_DECODER)
@@ -0,0 +1,95 @@
+import asyncio
+import random
+import time
+from collections import Counter
+
+import aiohttp
+
+from bot.config import settings
+from bot.utils.metrics import metrics
+from .cloudflare import is_challenge, may_be_challenge
+from .ratelimit import RateLimiter, rate_limiter
+from .responses import BufferedResponse, ResponseTooLarge, buffer_response
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504, 520, 521, 522, 524})
+
+retry_counters: Counter[str] = Counter()
+metrics.register_counter('bot_http_retries_total', 'endpoint', retry_counters, 'Retried HTTP attempts.')
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by attempts and an overall deadline.
+
+    Every attempt, retries included, first takes a token from ``limiter``.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, deadline: float,
+                 retry_on: frozenset[int] = RETRY_STATUSES, limiter: RateLimiter | None = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.limiter = limiter
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def request(self, http_client: aiohttp.ClientSession, method: str, url: str, endpoint: str,
+                      max_size: int, discard: bool = False, **kwargs) -> BufferedResponse:
+        """Send a request and buffer its body, retrying transport errors and ``retry_on`` statuses.
+
+        Cloudflare challenge pages are returned at once for the caller to
+        solve. The last response is returned once attempts or the deadline
+        run out; the last transport error is re-raised.
+        """
+        expires_at = time.monotonic() + self.deadline
+        last_error = None
+
+        for attempt in range(self.max_attempts):
+            bucket = await self.limiter.acquire(url, endpoint) if self.limiter is not None else None
+            try:
+                # Only the exchange itself is timed; limiter waits and backoff sleeps are not upstream latency.
+                with metrics.timer('http', endpoint) as timer:
+                    resp = await http_client.request(method, url, **kwargs)
+                    timer.status = resp.status
+                    # Telling a challenge from an ordinary Cloudflare 429/503 takes the body, so keep it for those.
+                    resp = await buffer_response(resp, max_size=max_size,
+                                                 discard=discard and not may_be_challenge(resp))
+                    resp.latency = time.perf_counter() - timer.started
+            except ResponseTooLarge:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                resp, last_error = None, error
+                if self.limiter is not None:
+                    self.limiter.feedback(bucket, endpoint, None)
+                if attempt + 1 >= self.max_attempts:
+                    raise
+            else:
+                if self.limiter is not None:
+                    self.limiter.feedback(bucket, endpoint, resp.status)
+                # Retrying a Cloudflare challenge only fetches the same page again; the caller solves it instead.
+                if resp.status not in self.retry_on or is_challenge(resp) or attempt + 1 >= self.max_attempts:
+                    return resp
+
+            delay = self.backoff(attempt)
+            if time.monotonic() + delay > expires_at:
+                if resp is None:
+                    raise last_error
+                return resp
+
+            retry_counters[endpoint] += 1
+            await asyncio.sleep(delay)
+
+
+retry_policy = RetryPolicy(
+    max_attempts=settings.HTTP_RETRY_ATTEMPTS,
+    base_delay=settings.HTTP_RETRY_BASE_DELAY,
+    max_delay=settings.HTTP_RETRY_MAX_DELAY,
+    deadline=settings.HTTP_RETRY_DEADLINE,
+    limiter=rate_limiter,
+)
+
+
+def get_retry_counters() -> dict[str, int]:
+    return dict(retry_counters)
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from bot.config import settings
+from bot.exceptions import RescheduleSession
+from bot.utils import logger
+from bot.utils.metrics import metrics
+from .ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+
+# Any status outside THROTTLE_STATUSES counts as a success for TokenBucket.feedback.
+OK_STATUS = 200
+flood_wait_counters: Counter[str] = Counter()
+metrics.register_counter('bot_telegram_flood_waits_total', 'method', flood_wait_counters,
+                         'FloodWait errors returned by Telegram.')
+
+
+class RpcGovernor:
+    """Paces Telegram calls per API_ID and per DC and turns FloodWait into a reschedule.
+
+    Short waits (up to ``sleep_threshold``) are slept off and the call is
+    retried once. Longer ones block further calls for that session and raise
+    RescheduleSession, so the scheduler frees the worker slot until the wait
+    is over instead of failing the cycle.
+    """
+
+    def __init__(self, api_rate: float, dc_rate: float, burst: float, sleep_threshold: float):
+        self.api_rate = api_rate
+        self.dc_rate = dc_rate
+        self.burst = burst
+        self.sleep_threshold = sleep_threshold
+        self.share = 1.0
+        self.buckets: dict[tuple[str, Any], TokenBucket] = {}
+        self.flood_until: dict[str, float] = {}
+        self._dc_ids: dict[str, int | None] = {}
+
+    def set_share(self, share: float) -> None:
+        """Scale every limit, e.g. to ``1 / workers`` when several processes share the API_ID."""
+        self.share = share
+        self.buckets.clear()
+
+    def _bucket(self, kind: str, key: Any, rate: float) -> TokenBucket:
+        bucket = self.buckets.get((kind, key))
+        if bucket is None:
+            rate *= self.share
+            bucket = self.buckets[(kind, key)] = TokenBucket(rate=rate, capacity=self.burst * self.share,
+                                                             min_rate=rate / 10, error_burst=1)
+        return bucket
+
+    async def _dc_id(self, session_name: str, tg_client: "Client") -> int | None:
+        if session_name not in self._dc_ids:
+            storage = getattr(tg_client, 'storage', None)
+            self._dc_ids[session_name] = await storage.dc_id() if storage is not None else None
+        return self._dc_ids[session_name]
+
+    def check(self, session_name: str) -> None:
+        """Raise RescheduleSession while ``session_name`` is still inside a FloodWait."""
+        remaining = self.flood_until.get(session_name, 0) - time.monotonic()
+        if remaining > 0:
+            raise RescheduleSession(session_name, remaining)
+
+    async def call(self, session_name: str, tg_client: "Client", method: str,
+                   func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        from pyrogram.errors import FloodWait
+
+        self.check(session_name)
+        dc_id = await self._dc_id(session_name, tg_client)
+        buckets = [self._bucket('api', settings.API_ID, self.api_rate)]
+        if dc_id is not None:
+            buckets.append(self._bucket('dc', dc_id, self.dc_rate))
+
+        for attempt in range(2):
+            for bucket in buckets:
+                await bucket.acquire()
+
+            try:
+                with metrics.timer('telegram', method):
+                    result = await func(*args, **kwargs)
+            except FloodWait as error:
+                flood_wait_counters[method] += 1
+                for bucket in buckets:
+                    bucket.feedback(None)
+
+                wait = float(error.value or 0)
+                if attempt == 0 and wait <= self.sleep_threshold:
+                    await asyncio.sleep(wait)
+                    continue
+
+                self.flood_until[session_name] = time.monotonic() + wait
+                logger.warning(f"{session_name} | FloodWait {wait:.0f}s on {method}")
+                raise RescheduleSession(session_name, wait) from error
+
+            # Successes let a rate halved by FloodWaits creep back to its ceiling.
+            for bucket in buckets:
+                bucket.feedback(OK_STATUS)
+            return result
+
+
+rpc_governor = RpcGovernor(api_rate=settings.TG_RPC_RATE, dc_rate=settings.TG_RPC_DC_RATE,
+                           burst=settings.TG_RPC_BURST, sleep_threshold=settings.TG_FLOOD_SLEEP_THRESHOLD)
@@ -0,0 +1,95 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+from bot.utils import logger
+
+
+class Scheduler:
+    """Runs session cycles from a due-time heap with a bounded worker pool.
+
+    ``runner`` receives the scheduled item and returns the delay in seconds
+    until the item is due again, or ``None`` to drop it from the schedule.
+    """
+
+    def __init__(self, runner: Callable[[Any], Awaitable[float | None]], max_concurrent: int):
+        self.runner = runner
+        self.max_concurrent = max(1, max_concurrent)
+
+        self._heap: list[tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._running: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._heap) + len(self._running)
+
+    def schedule(self, item: Any, delay: float = 0) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), item))
+        self._wakeup.set()
+
+    def stagger(self, items: list[Any], start: float, end: float) -> list[float]:
+        """Spread ``items`` evenly over ``[start, end)`` seconds from now, jittered within each slot."""
+        slot = (end - start) / len(items) if items else 0
+        delays = [start + (index + random.random()) * slot for index in range(len(items))]
+        for item, delay in zip(items, delays):
+            self.schedule(item, delay)
+        return delays
+
+    async def _wait_due(self) -> Any:
+        while True:
+            self._wakeup.clear()
+
+            if self._heap:
+                timeout = self._heap[0][0] - time.monotonic()
+                if timeout <= 0:
+                    return heapq.heappop(self._heap)[2]
+            elif self._running:
+                timeout = None
+            else:
+                return None
+
+            # A timer handle is cheaper than wait_for, which wraps the wait in a new task every time.
+            handle = asyncio.get_running_loop().call_later(timeout, self._wakeup.set) if timeout is not None else None
+            try:
+                await self._wakeup.wait()
+            finally:
+                if handle is not None:
+                    handle.cancel()
+
+    async def _run_item(self, item: Any) -> None:
+        try:
+            delay = await self.runner(item)
+        except Exception as error:
+            logger.error(f"Scheduler | Unhandled error in session cycle: {error}")
+            delay = None
+        finally:
+            self._slots.release()
+
+        if delay is not None:
+            self.schedule(item, delay)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        while self._heap or self._running:
+            await self._slots.acquire()
+            try:
+                item = await self._wait_due()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            if item is None:
+                self._slots.release()
+                break
+
+            task = asyncio.create_task(self._run_item(item))
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
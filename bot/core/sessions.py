@@ -0,0 +1,53 @@
+import os
+from typing import TYPE_CHECKING
+
+from bot.config import settings
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+
+SESSIONS_DIR = "sessions/"
+
+
+class SessionDescriptor:
+    """Lightweight handle for a session file; the Pyrogram client is built on demand."""
+
+    __slots__ = ("name", "path", "proxy")
+
+    def __init__(self, name: str, proxy: str | None = None, workdir: str = SESSIONS_DIR):
+        self.name = name
+        self.path = os.path.join(workdir, f"{name}.session")
+        self.proxy = proxy
+
+    def __repr__(self) -> str:
+        return f"SessionDescriptor(name={self.name!r}, proxy={self.proxy!r})"
+
+    def pyrogram_proxy(self) -> dict | None:
+        if not self.proxy:
+            return None
+
+        from better_proxy import Proxy
+
+        proxy = Proxy.from_str(self.proxy)
+        return dict(
+            scheme=proxy.protocol,
+            hostname=proxy.host,
+            port=proxy.port,
+            username=proxy.login,
+            password=proxy.password
+        )
+
+    def create_client(self) -> "Client":
+        from pyrogram import Client
+
+        return Client(
+            name=self.name,
+            api_id=settings.API_ID,
+            api_hash=settings.API_HASH,
+            workdir=os.path.dirname(self.path) or ".",
+            plugins=dict(root="bot/plugins"),
+            # FloodWait is handled by the RPC governor, which reschedules instead of sleeping here.
+            sleep_threshold=0,
+            # Pooled clients stay connected without start(), so nothing would ever drain pushed updates.
+            no_updates=True,
+        )
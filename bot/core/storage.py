@@ -0,0 +1,174 @@
+import json
+import sqlite3
+
+STORAGE_FILE = "state.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tg_cache (
+    session_name TEXT PRIMARY KEY,
+    user_id INTEGER,
+    first_name TEXT,
+    last_name TEXT,
+    username TEXT,
+    peer_id INTEGER,
+    peer_access_hash INTEGER,
+    web_data TEXT,
+    auth_date INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS session_state (
+    session_name TEXT PRIMARY KEY,
+    last_cycle_at REAL,
+    next_due_at REAL,
+    access_token TEXT,
+    token_expires_at REAL,
+    completed_tasks TEXT,
+    signed_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS session_manifest (
+    session_name TEXT PRIMARY KEY,
+    valid INTEGER,
+    reason TEXT,
+    dc_id INTEGER,
+    user_id INTEGER,
+    file_size INTEGER,
+    file_mtime REAL,
+    checked_at REAL,
+    authorized_at REAL,
+    auth_key_hash TEXT,
+    revoked INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS session_shards (
+    session_name TEXT PRIMARY KEY,
+    worker INTEGER,
+    proxy TEXT
+);
+"""
+
+TABLE_FIELDS = {
+    "tg_cache": ("user_id", "first_name", "last_name", "username", "peer_id", "peer_access_hash", "web_data",
+                 "auth_date"),
+    "session_state": ("last_cycle_at", "next_due_at", "access_token", "token_expires_at", "completed_tasks",
+                      "signed_at"),
+    "session_manifest": ("valid", "reason", "dc_id", "user_id", "file_size", "file_mtime", "checked_at",
+                         "authorized_at", "auth_key_hash", "revoked"),
+}
+
+# Columns added after a table first shipped; CREATE TABLE IF NOT EXISTS leaves existing files without them.
+ADDED_COLUMNS = {
+    "session_state": (("signed_at", "REAL"),),
+    "session_manifest": (("auth_key_hash", "TEXT"), ("revoked", "INTEGER")),
+}
+
+
+class Storage:
+    """Small SQLite store for per-session data that should survive restarts."""
+
+    def __init__(self, file_name: str = STORAGE_FILE):
+        self.file_name = file_name
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.file_name, isolation_level=None, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            self._add_columns(self._connection)
+        return self._connection
+
+    @staticmethod
+    def _add_columns(connection: sqlite3.Connection) -> None:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns:
+                if column in existing:
+                    continue
+                try:
+                    connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                except sqlite3.OperationalError as error:
+                    # Another worker process added it first.
+                    if "duplicate column" not in str(error):
+                        raise
+
+    def _get(self, table: str, session_name: str) -> dict | None:
+        row = self.connection.execute(f"SELECT * FROM {table} WHERE session_name = ?", (session_name,)).fetchone()
+        return dict(row) if row else None
+
+    def _update(self, table: str, session_name: str, fields: dict) -> None:
+        unknown = set(fields) - set(TABLE_FIELDS[table])
+        if unknown:
+            raise ValueError(f"Unknown {table} fields: {', '.join(sorted(unknown))}")
+
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{field} = excluded.{field}" for field in fields)
+        self.connection.execute(
+            f"INSERT INTO {table} (session_name, {columns}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(session_name) DO UPDATE SET {updates}",
+            (session_name, *fields.values()),
+        )
+
+    def get_tg_cache(self, session_name: str) -> dict | None:
+        return self._get("tg_cache", session_name)
+
+    def update_tg_cache(self, session_name: str, **fields) -> None:
+        self._update("tg_cache", session_name, fields)
+
+    def get_state(self, session_name: str) -> dict | None:
+        state = self._get("session_state", session_name)
+        if state is not None:
+            completed_tasks = state["completed_tasks"]
+            state["completed_tasks"] = set(json.loads(completed_tasks)) if completed_tasks else set()
+        return state
+
+    def update_state(self, session_name: str, **fields) -> None:
+        if "completed_tasks" in fields and fields["completed_tasks"] is not None:
+            fields["completed_tasks"] = json.dumps(sorted(fields["completed_tasks"]))
+        self._update("session_state", session_name, fields)
+
+    def get_due_times(self) -> dict[str, float]:
+        rows = self.connection.execute(
+            "SELECT session_name, next_due_at FROM session_state WHERE next_due_at IS NOT NULL").fetchall()
+        return {row["session_name"]: row["next_due_at"] for row in rows}
+
+    def get_manifest(self) -> dict[str, dict]:
+        rows = self.connection.execute("SELECT * FROM session_manifest").fetchall()
+        return {row["session_name"]: dict(row) for row in rows}
+
+    def update_manifest(self, session_name: str, **fields) -> None:
+        self._update("session_manifest", session_name, fields)
+
+    def set_shards(self, shards: list[list[tuple[str, str | None]]]) -> None:
+        """Replace the worker plan: ``shards[i]`` lists the (session name, proxy) pairs worker ``i`` runs."""
+        connection = self.connection
+        connection.execute("BEGIN")
+        try:
+            connection.execute("DELETE FROM session_shards")
+            connection.executemany(
+                "INSERT INTO session_shards (session_name, worker, proxy) VALUES (?, ?, ?)",
+                [(session_name, worker, proxy) for worker, shard in enumerate(shards)
+                 for session_name, proxy in shard],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get_shard(self, worker: int) -> list[tuple[str, str | None]]:
+        rows = self.connection.execute(
+            "SELECT session_name, proxy FROM session_shards WHERE worker = ? ORDER BY session_name", (worker,)
+        ).fetchall()
+        return [(row["session_name"], row["proxy"]) for row in rows]
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+storage = Storage()
@@ -1,28 +1,51 @@
 import asyncio
-import json
 import random
-from urllib.parse import unquote
+import time
+from urllib.parse import parse_qs, unquote
+
+from typing import TYPE_CHECKING
 
 import aiohttp
-from aiocfscrape import CloudflareScraper
-from aiohttp_proxy import ProxyConnector
-from better_proxy import Proxy
-from pyrogram import Client
-from pyrogram.errors import Unauthorized, UserDeactivated, AuthKeyUnregistered
-from pyrogram.raw import types
-from pyrogram.raw.functions.messages import RequestAppWebView
+from multidict import CIMultiDict
 
 from bot.config import settings
-from bot.exceptions import InvalidSession
+from bot.exceptions import InvalidSession, RescheduleSession
 from bot.utils import logger
+from bot.utils.logger import enabled as log_enabled
+from bot.utils.metrics import metrics
 from .agents import generate_random_user_agent
-from .headers import headers
+from . import cloudflare
+from .assets import asset_cache
+from .client_pool import client_pool
+from .connections import connector_pool
+from .headers import build_headers, with_authorization
+from .proxies import proxy_manager
+from .recording import recorder
+from .responses import (BufferedResponse, DoTaskResponse, LoginResponse, SuccessTaskResponse, buffer_response,
+                        response_decoder)
+from .helper import format_duration
+from .retry import retry_policy
+from .rpc import rpc_governor
+from .sessions import SessionDescriptor
+from .storage import storage
+from .tokens import token_cache
+from .user_agents import user_agents
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+
+TASK_IDS = (1, 3, 5, 4, 12, 13, 10, 9, 11, 17, 14, 15, 16, 6, 7, 18, 19, 20, 22, 21, 28, 29, 26, 27, 24, 25, 37, 38, 39,
+            40, 30, 31, 33, 32, 34, 35, 36)
+SIGN_TASK_ID = 177
+ALL_TASK_IDS = frozenset((*TASK_IDS, SIGN_TASK_ID))
+# The sign-in is daily; every other task only has to be done once.
+SIGN_INTERVAL = 24 * 60 * 60
 
 
 class Tapper:
-    def __init__(self, tg_client: Client):
-        self.session_name = tg_client.name
-        self.tg_client = tg_client
+    def __init__(self, session: SessionDescriptor):
+        self.session_name = session.name
+        self.session = session
         self.user_id = 0
         self.username = None
         self.first_name = None
@@ -32,141 +55,162 @@ class Tapper:
         self.peer = None
         self.first_run = None
 
-        self.session_ug_dict = self.load_user_agents() or []
-
-        headers['User-Agent'] = self.check_user_agent()
+        # Headers go with each request, not on the ClientSession: aiohttp folds session default headers into
+        # the connection key, so per-session ones would stop sessions sharing pooled connections.
+        self.base_headers = build_headers(user_agent=user_agents.get_or_create(self.session_name))
+        self.headers = self.base_headers
 
     async def generate_random_user_agent(self):
         return generate_random_user_agent(device_type='android', browser_type='chrome')
 
-    def info(self, message):
-        from bot.utils import info
-        info(f"<light-yellow>{self.session_name}</light-yellow> | {message}")
-
-    def debug(self, message):
-        from bot.utils import debug
-        debug(f"<light-yellow>{self.session_name}</light-yellow> | {message}")
-
-    def warning(self, message):
-        from bot.utils import warning
-        warning(f"<light-yellow>{self.session_name}</light-yellow> | {message}")
-
-    def error(self, message):
-        from bot.utils import error
-        error(f"<light-yellow>{self.session_name}</light-yellow> | {message}")
-
-    def critical(self, message):
-        from bot.utils import critical
-        critical(f"<light-yellow>{self.session_name}</light-yellow> | {message}")
-
-    def success(self, message):
-        from bot.utils import success
-        success(f"<light-yellow>{self.session_name}</light-yellow> | {message}")
-
-    def save_user_agent(self):
-        user_agents_file_name = "user_agents.json"
-
-        if not any(session['session_name'] == self.session_name for session in self.session_ug_dict):
-            user_agent_str = generate_random_user_agent()
-
-            self.session_ug_dict.append({
-                'session_name': self.session_name,
-                'user_agent': user_agent_str})
-
-            with open(user_agents_file_name, 'w') as user_agents:
-                json.dump(self.session_ug_dict, user_agents, indent=4)
-
-            logger.success(f"<light-yellow>{self.session_name}</light-yellow> | User agent saved successfully")
-
-            return user_agent_str
-
-    def load_user_agents(self):
-        user_agents_file_name = "user_agents.json"
+    def log(self, level: str, message: str, *args, **fields) -> None:
+        if not log_enabled(level):
+            return
+        if args:
+            message = message.format(*args)
+        logger.bind(session=self.session_name, **fields).log(
+            level, f"<light-yellow>{self.session_name}</light-yellow> | {message}")
+
+    def info(self, message, *args, **fields):
+        self.log('INFO', message, *args, **fields)
+
+    def debug(self, message, *args, **fields):
+        self.log('DEBUG', message, *args, **fields)
+
+    def warning(self, message, *args, **fields):
+        self.log('WARNING', message, *args, **fields)
+
+    def error(self, message, *args, **fields):
+        self.log('ERROR', message, *args, **fields)
+
+    def critical(self, message, *args, **fields):
+        self.log('CRITICAL', message, *args, **fields)
+
+    def success(self, message, *args, **fields):
+        self.log('SUCCESS', message, *args, **fields)
+
+    async def request(self, http_client: aiohttp.ClientSession, method: str, url: str, endpoint: str,
+                      discard: bool = False, **kwargs) -> BufferedResponse:
+        # Captures keep every body so replays send realistic payloads.
+        discard = discard and not recorder.enabled
+        extra_headers = kwargs.pop('headers', None)
+        kwargs['headers'] = self.headers
+        if extra_headers:
+            kwargs['headers'] = CIMultiDict(self.headers)
+            kwargs['headers'].update(extra_headers)
+
+        resp = await retry_policy.request(http_client, method, url, endpoint=endpoint,
+                                          max_size=settings.HTTP_MAX_BODY_SIZE, discard=discard, **kwargs)
+        if cloudflare.is_challenge(resp):
+            with metrics.timer('http', 'cloudflare') as timer:
+                resp = await cloudflare.solve(http_client, method, url, **kwargs)
+                timer.status = resp.status
+                resp = await buffer_response(resp, max_size=settings.HTTP_MAX_BODY_SIZE, discard=discard)
+                resp.latency = time.perf_counter() - timer.started
+
+        if recorder.enabled:
+            recorder.record(self.session_name, endpoint, method, url, resp.status, resp.headers, resp.body,
+                            latency=resp.latency)
+
+        if resp.status == 401 and 'Authorization' in kwargs['headers']:
+            token_cache.invalidate(self.session_name)
+
+        if log_enabled('DEBUG'):
+            latency = round(resp.latency, 4)
+            self.debug("{} {} -> {} in {}s", method, endpoint, resp.status, latency,
+                       endpoint=endpoint, status=resp.status, latency=latency)
+
+        return resp
+
+    def load_tg_cache(self) -> dict:
+        cache = storage.get_tg_cache(self.session_name) or {}
+
+        if cache.get('user_id'):
+            self.user_id = cache['user_id']
+            self.first_name = cache['first_name'] or ''
+            self.last_name = cache['last_name'] or ''
+            self.username = cache['username'] or ''
+
+        if cache.get('peer_id') is not None:
+            from pyrogram.raw import types
+
+            self.peer = types.InputPeerUser(user_id=cache['peer_id'], access_hash=cache['peer_access_hash'])
+
+        return cache
+
+    async def request_web_view(self, tg_client: "Client") -> str:
+        from pyrogram.raw import types
+        from pyrogram.raw.functions.messages import RequestAppWebView
+
+        # 用户信息已缓存时不再调用get_me
+        if not self.user_id:
+            information = await rpc_governor.call(self.session_name, tg_client, 'get_me', tg_client.get_me)
+            self.user_id = information.id
+            self.first_name = information.first_name or ''
+            self.last_name = information.last_name or ''
+            self.username = information.username or ''
+
+        first_name = self.first_name
+        if settings.ADD_TOMATO:
+            if not first_name.startswith("PEPES"):
+                await rpc_governor.call(self.session_name, tg_client, 'update_profile', tg_client.update_profile,
+                                        first_name="PEPES" + first_name, bio="PEPES")
+                self.first_name = "PEPES" + first_name
+        if settings.DELETE_TOMATO:
+            if first_name.startswith("PEPES"):
+                await rpc_governor.call(self.session_name, tg_client, 'update_profile', tg_client.update_profile,
+                                        first_name=first_name.replace("PEPES", ""), bio="")
+                self.first_name = first_name.replace("PEPES", "")
+
+        self.start_param = random.choices([settings.REF_ID, "7392018078"], weights=[75, 25], k=1)[0]
+        if self.peer is None:
+            self.peer = await rpc_governor.call(self.session_name, tg_client, 'resolve_peer', tg_client.resolve_peer,
+                                                'TONPEPES_BOT')
+        InputBotApp = types.InputBotAppShortName(bot_id=self.peer, short_name="PEPES")
+
+        web_view = await rpc_governor.call(self.session_name, tg_client, 'RequestAppWebView', tg_client.invoke,
+                                           RequestAppWebView(
+                                               peer=self.peer,
+                                               app=InputBotApp,
+                                               platform='android',
+                                               write_allowed=True,
+                                               start_param=self.start_param
+                                           ))
+
+        auth_url = web_view.url
+        return unquote(
+            string=auth_url.split('tgWebAppData=', maxsplit=1)[1].split('&tgWebAppVersion', maxsplit=1)[0])
+
+    async def get_tg_web_data(self) -> str:
+        cache = self.load_tg_cache()
+        if cache.get('web_data') and (cache['auth_date'] or 0) + settings.TG_WEB_DATA_TTL > time.time():
+            return cache['web_data']
+
+        # Telegram is only contacted when the cached WebView data has expired, so pyrogram loads lazily.
+        from pyrogram.errors import Unauthorized, UserDeactivated, AuthKeyUnregistered
+
+        rpc_governor.check(self.session_name)
+        proxy_dict = self.session.pyrogram_proxy()
 
         try:
-            with open(user_agents_file_name, 'r') as user_agents:
-                session_data = json.load(user_agents)
-                if isinstance(session_data, list):
-                    return session_data
-
-        except FileNotFoundError:
-            logger.warning("User agents file not found, creating...")
-
-        except json.JSONDecodeError:
-            logger.warning("User agents file is empty or corrupted.")
-
-        return []
-
-    def check_user_agent(self):
-        load = next(
-            (session['user_agent'] for session in self.session_ug_dict if session['session_name'] == self.session_name),
-            None)
-
-        if load is None:
-            return self.save_user_agent()
-
-        return load
-
-    async def get_tg_web_data(self, proxy: str | None) -> str:
-        if proxy:
-            proxy = Proxy.from_str(proxy)
-            proxy_dict = dict(
-                scheme=proxy.protocol,
-                hostname=proxy.host,
-                port=proxy.port,
-                username=proxy.login,
-                password=proxy.password
-            )
-        else:
-            proxy_dict = None
-
-        self.tg_client.proxy = proxy_dict
-
-        try:
-            with_tg = True
-
-            if not self.tg_client.is_connected:
-                with_tg = False
-                try:
-                    await self.tg_client.connect()
-                except (Unauthorized, UserDeactivated, AuthKeyUnregistered):
-                    raise InvalidSession(self.session_name)
-            information = await self.tg_client.get_me()
-            if settings.ADD_TOMATO:
-                if not information.first_name.startswith("PEPES"):
-                    await self.tg_client.update_profile(first_name="PEPES" + information.first_name, bio="PEPES")
-            if settings.DELETE_TOMATO:
-                if information.first_name.startswith("PEPES"):
-                    await self.tg_client.update_profile(first_name=information.first_name.replace("PEPES", ""), bio="")
-
-            self.start_param = random.choices([settings.REF_ID, "7392018078"], weights=[75, 25], k=1)[0]
-            peer = await self.tg_client.resolve_peer('TONPEPES_BOT')
-            InputBotApp = types.InputBotAppShortName(bot_id=peer, short_name="PEPES")
-
-            web_view = await self.tg_client.invoke(RequestAppWebView(
-                peer=peer,
-                app=InputBotApp,
-                platform='android',
-                write_allowed=True,
-                start_param=self.start_param
-            ))
-
-            auth_url = web_view.url
-            tg_web_data = unquote(
-                string=auth_url.split('tgWebAppData=', maxsplit=1)[1].split('&tgWebAppVersion', maxsplit=1)[0])
-
             try:
-                if self.user_id == 0:
-                    information = await self.tg_client.get_me()
-                    self.user_id = information.id
-                    self.first_name = information.first_name or ''
-                    self.last_name = information.last_name or ''
-                    self.username = information.username or ''
-            except Exception as e:
-                print(e)
-
-            if with_tg is False:
-                await self.tg_client.disconnect()
+                async with client_pool.connection(session=self.session, proxy=proxy_dict) as tg_client:
+                    tg_web_data = await self.request_web_view(tg_client=tg_client)
+            except (Unauthorized, UserDeactivated, AuthKeyUnregistered):
+                raise InvalidSession(self.session_name)
+
+            auth_date = parse_qs(tg_web_data).get('auth_date', ['0'])[0]
+            storage.update_tg_cache(
+                self.session_name,
+                user_id=self.user_id,
+                first_name=self.first_name,
+                last_name=self.last_name,
+                username=self.username,
+                peer_id=self.peer.user_id,
+                peer_access_hash=self.peer.access_hash,
+                web_data=tg_web_data,
+                auth_date=int(auth_date) if auth_date.isdigit() else 0,
+            )
 
             return tg_web_data
 
@@ -174,66 +218,84 @@ class Tapper:
             raise error
 
         except Exception as error:
-            logger.error(
-                f"<light-yellow>{self.session_name}</light-yellow> | Unknown error during Authorization: {error}")
-            await asyncio.sleep(delay=3)
+            self.peer = None
+            storage.update_tg_cache(self.session_name, peer_id=None, peer_access_hash=None, web_data=None)
+            self.error(f"Unknown error during Authorization: {error}")
+            return None
 
     async def login(self, http_client: aiohttp.ClientSession, initdata):
         try:
-            await http_client.options(url='https://api.tonpepes.xyz/api/User/Login')
-            while True:
-                json_data = {"initData": initdata, 'inviteUser': settings.REF_ID}
-                resp = await http_client.post("https://api.tonpepes.xyz/api/User/Login", json=json_data, ssl=False)
-                if resp.status == 520:
-                    self.warning('重新登录')
-                    await asyncio.sleep(delay=5)
-                    continue
-                resp_json = await resp.json()
-                return resp_json.get("data").get("token")
+            await self.request(http_client, 'OPTIONS', f'{settings.API_URL}/api/User/Login', endpoint='User/Login',
+                               discard=True)
+            json_data = {"initData": initdata, 'inviteUser': settings.REF_ID}
+            resp = await self.request(http_client, 'POST', f"{settings.API_URL}/api/User/Login",
+                                      endpoint='User/Login', json=json_data, ssl=False)
+            if resp.status == 520:
+                self.warning('重新登录')
+            login_response = await response_decoder.read(resp, LoginResponse)
+            return login_response.token
         except Exception as error:
-            logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Login error {error}")
-            return None, None
+            self.error(f"Login error {error}")
+            return None
+
+    async def authorize(self, http_client: aiohttp.ClientSession, proxy: str | None) -> str | None:
+        async def refresh() -> str | None:
+            init_data = await self.get_tg_web_data()
+            if not init_data:
+                return None
+            # 加载css或者js
+            results = await asset_cache.prefetch(http_client=http_client, headers=self.headers,
+                                                 session_name=self.session_name)
+            if any(isinstance(result, BaseException) for result in results):
+                self.error("加载css和js失败")
+            self.info("登录之前加载css和js完成!")
+            return await self.login(http_client=http_client, initdata=init_data)
+
+        access_token = await token_cache.get_or_refresh(self.session_name, refresh=refresh)
+        if access_token:
+            self.headers = with_authorization(self.base_headers, access_token)
+        return access_token
 
     async def claim_task(self, http_client: aiohttp.ClientSession, task_id):
         try:
-            resp = await http_client.post(f'https://game-domain.blum.codes/api/v1/tasks/{task_id}/claim',
-                                          ssl=False)
+            resp = await self.request(http_client, 'POST',
+                                      f'https://game-domain.blum.codes/api/v1/tasks/{task_id}/claim',
+                                      endpoint='tasks/claim', ssl=False)
             resp_json = await resp.json()
 
             # logger.debug(f"{self.session_name} | claim_task response: {resp_json}")
 
             return resp_json.get('status') == "FINISHED"
         except Exception as error:
-            logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Claim task error {error}")
+            self.error(f"Claim task error {error}")
 
     async def start_task(self, http_client: aiohttp.ClientSession, task_id):
         try:
-            resp = await http_client.post(f'https://game-domain.blum.codes/api/v1/tasks/{task_id}/start',
-                                          ssl=False)
+            resp = await self.request(http_client, 'POST',
+                                      f'https://game-domain.blum.codes/api/v1/tasks/{task_id}/start',
+                                      endpoint='tasks/start', ssl=False)
             resp_json = await resp.json()
 
         except Exception as error:
-            logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Start complete error {error}")
+            self.error(f"Start complete error {error}")
 
     async def join_tribe(self, http_client: aiohttp.ClientSession):
         try:
-            resp = await http_client.post(
-                f'https://tribe-domain.blum.codes/api/v1/tribe/510c4987-ff99-4bd4-9e74-29ba9bce8220/join',
-                ssl=False)
+            resp = await self.request(
+                http_client, 'POST',
+                'https://tribe-domain.blum.codes/api/v1/tribe/510c4987-ff99-4bd4-9e74-29ba9bce8220/join',
+                endpoint='tribe/join', ssl=False)
             text = await resp.text()
             if text == 'OK':
                 self.success(f'Joined tribe')
         except Exception as error:
-            logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Join tribe {error}")
+            self.error(f"Join tribe {error}")
 
     async def get_tasks(self, http_client: aiohttp.ClientSession):
         try:
-            while True:
-                resp = await http_client.get('https://game-domain.blum.codes/api/v1/tasks', ssl=False)
-                if resp.status not in [200, 201]:
-                    continue
-                else:
-                    break
+            resp = await self.request(http_client, 'GET', 'https://game-domain.blum.codes/api/v1/tasks',
+                                      endpoint='tasks', ssl=False)
+            resp.raise_for_status()
             resp_json = await resp.json()
 
             # logger.debug(f"{self.session_name} | get_tasks response: {resp_json}")
@@ -242,10 +304,10 @@ class Tapper:
             if isinstance(resp_json, list):
                 return tasks
             else:
-                logger.error(f"{self.session_name} | Unexpected response format in get_tasks: {resp_json}")
+                self.error(f"Unexpected response format in get_tasks: {resp_json}")
                 return []
         except Exception as error:
-            logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Get tasks error {error}")
+            self.error(f"Get tasks error {error}")
 
     async def play_game(self, http_client: aiohttp.ClientSession, play_passes):
         try:
@@ -254,8 +316,7 @@ class Tapper:
                 game_id = await self.start_game(http_client=http_client)
 
                 if not game_id or game_id == "cannot start game":
-                    logger.info(f"<light-yellow>{self.session_name}</light-yellow> | Couldn't start play in game!"
-                                f" play_passes: {play_passes}, trying again")
+                    self.info(f"Couldn't start play in game! play_passes: {play_passes}, trying again")
                     tries -= 1
                     if tries == 0:
                         self.warning('No more trying, gonna skip games')
@@ -267,23 +328,22 @@ class Tapper:
 
                 msg, points = await self.claim_game(game_id=game_id, http_client=http_client)
                 if isinstance(msg, bool) and msg:
-                    logger.info(f"<light-yellow>{self.session_name}</light-yellow> | Finish play in game!"
-                                f" reward: {points}")
+                    self.info(f"Finish play in game! reward: {points}")
                 else:
-                    logger.info(f"<light-yellow>{self.session_name}</light-yellow> | Couldn't play game,"
-                                f" msg: {msg} play_passes: {play_passes}")
+                    self.info(f"Couldn't play game, msg: {msg} play_passes: {play_passes}")
                     break
 
                 await asyncio.sleep(random.uniform(30, 40))
 
                 play_passes -= 1
         except Exception as e:
-            logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Error occurred during play game: {e}")
+            self.error(f"Error occurred during play game: {e}")
             await asyncio.sleep(random.randint(0, 5))
 
     async def start_game(self, http_client: aiohttp.ClientSession):
         try:
-            resp = await http_client.post("https://game-domain.blum.codes/api/v1/game/play", ssl=False)
+            resp = await self.request(http_client, 'POST', "https://game-domain.blum.codes/api/v1/game/play",
+                                      endpoint='game/play', ssl=False)
             response_data = await resp.json()
             if "gameId" in response_data:
                 return response_data.get("gameId")
@@ -297,11 +357,8 @@ class Tapper:
             points = random.randint(settings.POINTS[0], settings.POINTS[1])
             json_data = {"gameId": game_id, "points": points}
 
-            resp = await http_client.post("https://game-domain.blum.codes/api/v1/game/claim", json=json_data,
-                                          ssl=False)
-            if resp.status != 200:
-                resp = await http_client.post("https://game-domain.blum.codes/api/v1/game/claim", json=json_data,
-                                              ssl=False)
+            resp = await self.request(http_client, 'POST', "https://game-domain.blum.codes/api/v1/game/claim",
+                                      endpoint='game/claim', json=json_data, ssl=False)
 
             txt = await resp.text()
 
@@ -311,9 +368,8 @@ class Tapper:
 
     async def claim(self, http_client: aiohttp.ClientSession):
         try:
-            resp = await http_client.post("https://game-domain.blum.codes/api/v1/farming/claim", ssl=False)
-            if resp.status != 200:
-                resp = await http_client.post("https://game-domain.blum.codes/api/v1/farming/claim", ssl=False)
+            resp = await self.request(http_client, 'POST', "https://game-domain.blum.codes/api/v1/farming/claim",
+                                      endpoint='farming/claim', ssl=False)
 
             resp_json = await resp.json()
 
@@ -323,21 +379,16 @@ class Tapper:
 
     async def start(self, http_client: aiohttp.ClientSession):
         try:
-            resp = await http_client.post("https://game-domain.blum.codes/api/v1/farming/start", ssl=False)
-
-            if resp.status != 200:
-                resp = await http_client.post("https://game-domain.blum.codes/api/v1/farming/start", ssl=False)
+            await self.request(http_client, 'POST', "https://game-domain.blum.codes/api/v1/farming/start",
+                               endpoint='farming/start', discard=True, ssl=False)
         except Exception as e:
             self.error(f"Error occurred during start: {e}")
 
     async def friend_balance(self, http_client: aiohttp.ClientSession):
         try:
-            while True:
-                resp = await http_client.get("https://user-domain.blum.codes/api/v1/friends/balance", ssl=False)
-                if resp.status not in [200, 201]:
-                    continue
-                else:
-                    break
+            resp = await self.request(http_client, 'GET', "https://user-domain.blum.codes/api/v1/friends/balance",
+                                      endpoint='friends/balance', ssl=False)
+            resp.raise_for_status()
             resp_json = await resp.json()
             claim_amount = resp_json.get("amountForClaim")
             is_available = resp_json.get("canClaim")
@@ -349,22 +400,18 @@ class Tapper:
 
     async def friend_claim(self, http_client: aiohttp.ClientSession):
         try:
-
-            resp = await http_client.post("https://user-domain.blum.codes/api/v1/friends/claim", ssl=False)
+            resp = await self.request(http_client, 'POST', "https://user-domain.blum.codes/api/v1/friends/claim",
+                                      endpoint='friends/claim', ssl=False)
             resp_json = await resp.json()
-            amount = resp_json.get("claimBalance")
-            if resp.status != 200:
-                resp = await http_client.post("https://user-domain.blum.codes/api/v1/friends/claim", ssl=False)
-                resp_json = await resp.json()
-                amount = resp_json.get("claimBalance")
 
-            return amount
+            return resp_json.get("claimBalance")
         except Exception as e:
             self.error(f"Error occurred during friends claim: {e}")
 
     async def balance(self, http_client: aiohttp.ClientSession):
         try:
-            resp = await http_client.get("https://game-domain.blum.codes/api/v1/user/balance", ssl=False)
+            resp = await self.request(http_client, 'GET', "https://game-domain.blum.codes/api/v1/user/balance",
+                                      endpoint='user/balance', ssl=False)
             resp_json = await resp.json()
 
             timestamp = resp_json.get("timestamp")
@@ -385,8 +432,9 @@ class Tapper:
 
     async def claim_daily_reward(self, http_client: aiohttp.ClientSession):
         try:
-            resp = await http_client.post("https://game-domain.blum.codes/api/v1/daily-reward?offset=-180",
-                                          ssl=False)
+            resp = await self.request(http_client, 'POST',
+                                      "https://game-domain.blum.codes/api/v1/daily-reward?offset=-180",
+                                      endpoint='daily-reward', ssl=False)
             txt = await resp.text()
             return True if txt == 'OK' else txt
         except Exception as e:
@@ -394,108 +442,144 @@ class Tapper:
 
     async def refresh_token(self, http_client: aiohttp.ClientSession, token):
         json_data = {'refresh': token}
-        resp = await http_client.post("https://gateway.blum.codes/api/v1/auth/refresh", json=json_data, ssl=False)
+        resp = await self.request(http_client, 'POST', "https://gateway.blum.codes/api/v1/auth/refresh",
+                                  endpoint='auth/refresh', json=json_data, ssl=False)
         resp_json = await resp.json()
 
         return resp_json.get('access'), resp_json.get('refresh')
 
-    async def check_proxy(self, http_client: aiohttp.ClientSession, proxy: Proxy) -> None:
-        try:
-            response = await http_client.get(url='https://httpbin.org/ip', timeout=aiohttp.ClientTimeout(5))
-            ip = (await response.json()).get('origin')
-            logger.info(f"<light-yellow>{self.session_name}</light-yellow> | Proxy IP: {ip}")
-        except Exception as error:
-            logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Proxy: {proxy} | Error: {error}")
-
-    async def run(self, proxy: str | None) -> None:
-        random_delay = random.randint(0, 15)
-        logger.info(f"{self.tg_client.name} | Bot will start in <light-red>{random_delay}s</light-red>")
-        await asyncio.sleep(delay=random_delay)
-        login_need = True
+    async def check_proxy(self, proxy: str) -> None:
+        health = await proxy_manager.check(proxy)
+        if health.alive:
+            self.info(f"Proxy IP: {health.ip}")
+        else:
+            self.error(f"Proxy: {proxy} | Error: health check failed")
 
-        proxy_conn = ProxyConnector().from_url(proxy) if proxy else None
+    async def run(self, proxy: str | None) -> float | None:
+        async with connector_pool.connector(proxy) as connector:
+            http_client = aiohttp.ClientSession(connector=connector, connector_owner=False)
+            try:
+                return await self.cycle(http_client=http_client, proxy=proxy)
+            finally:
+                # 断开session链接
+                await http_client.close()
 
-        http_client = CloudflareScraper(headers=headers, connector=proxy_conn)
+    async def cycle(self, http_client: aiohttp.ClientSession, proxy: str | None) -> float | None:
+        login_need = True
+        next_run = None
 
         if proxy:
-            await self.check_proxy(http_client=http_client, proxy=proxy)
+            await self.check_proxy(proxy=proxy)
             try:
-                if "Authorization" in http_client.headers:
-                    del http_client.headers["Authorization"]
-
-                init_data = await self.get_tg_web_data(proxy=proxy)
-                # 加载css或者js
-                init_url = [
-                    'https://tg.tonpepes.xyz/',
-                    'https://tg.tonpepes.xyz/static/js/main.93a8b697.js',
-                    'https://tg.tonpepes.xyz/static/css/main.84f02eae.css',
-                    'https://tg.tonpepes.xyz/static/media/logo.0c61def9ae172064e82fba1985ad2c81.svg',
-                    'https://tg.tonpepes.xyz/Roboto-Blod.ttf'
-                ]
-                try:
-                    for u in init_url:
-                        await asyncio.sleep(random.uniform(1, 2))
-                        await http_client.get(u, ssl=False)
-                except Exception as e:
-                    logger.error(f"加载css和js失败", e)
-                logger.info(f"登录之前{self.session_name}加载css和js完成!")
-                access_token = await self.login(http_client=http_client, initdata=init_data)
-                http_client.headers["Authorization"] = f"Bearer {access_token}"
-                # 获取完成的列表
-                tasks = await self.SuccessTask(http_client=http_client)
+                self.headers = self.base_headers
+
+                reused_token = token_cache.get(self.session_name) is not None
+                if not await self.authorize(http_client=http_client, proxy=proxy):
+                    self.warning("登录失败,稍后重试")
+                    return random.randint(*settings.RETRY_DELAY)
+                # 获取完成的列表,沿用本地记录避免重启后重复请求
+                state = storage.get_state(self.session_name) or {}
+                tasks = set(state.get('completed_tasks') or ())
+                if (state.get('signed_at') or 0) > time.time() - SIGN_INTERVAL:
+                    tasks.add(SIGN_TASK_ID)
+                if not ALL_TASK_IDS <= tasks:
+                    completed = await self.SuccessTask(http_client=http_client)
+                    if reused_token and token_cache.get(self.session_name) is None:
+                        # 缓存的token已失效,重新登录一次
+                        await self.authorize(http_client=http_client, proxy=proxy)
+                        completed = await self.SuccessTask(http_client=http_client)
+                    if completed is None:
+                        # 不知道哪些任务已完成时不做任务,稍后重试
+                        self.warning("获取完成列表失败,稍后重试")
+                        return random.randint(*settings.RETRY_DELAY)
+                    if SIGN_TASK_ID in completed and SIGN_TASK_ID not in tasks:
+                        storage.update_state(self.session_name, signed_at=time.time())
+                    tasks |= completed
+                    self.save_tasks(tasks)
                 # 签到
-                await self.sign(http_client=http_client, tasks=tasks)
-                # 做任务
+                if await self.sign(http_client=http_client, tasks=tasks):
+                    tasks.add(SIGN_TASK_ID)
+                    storage.update_state(self.session_name, signed_at=time.time())
+                # 做任务,每完成一个就保存,崩溃后从这里继续
                 await self.makeTask(http_client=http_client, tasks=tasks)
+                storage.update_state(self.session_name, last_cycle_at=time.time())
                 random_delay = random.randint(1, 20)
-                logger.info(
-                    f"{self.tg_client.name} |睡眠24小时<light-red>{random_delay}分</light-red>")
-                await asyncio.sleep(delay=(24 * 60 * 60 + random_delay * 60))
+                self.info("睡眠24小时<light-red>{}分</light-red>", random_delay)
+                next_run = 24 * 60 * 60 + random_delay * 60
+                proxy_manager.report(proxy, ok=True)
             except Exception as error:
-                logger.error(f"<light-yellow>{self.session_name}</light-yellow> | Unknown error: {error}")
-                await asyncio.sleep(delay=3)
-        # 断开session链接
-        await http_client.close()
+                self.error(f"Unknown error: {error}")
+                next_run = random.randint(*settings.RETRY_DELAY)
+                proxy_manager.report(proxy, ok=False)
+
+        return next_run
 
-    async def SuccessTask(self, http_client: aiohttp.ClientSession):
+    async def SuccessTask(self, http_client: aiohttp.ClientSession) -> set[int] | None:
         try:
-            resp = await http_client.get("https://api.tonpepes.xyz/api/User/SuccessTask", ssl=False)
-            money_json = await resp.json()
-            taskList = money_json.get('data')
-            tasks = []
-            for task in taskList:
-                changeType = task.get('changeType')
-                tasks.append(changeType)
-            return tasks
+            resp = await self.request(http_client, 'GET', f"{settings.API_URL}/api/User/SuccessTask",
+                                      endpoint='User/SuccessTask', ssl=False)
+            resp.raise_for_status()
+            success_response = await response_decoder.read(resp, SuccessTaskResponse)
+            return success_response.completed
         except Exception as e:
-            self.error(f"Error occurred during claim daily reward: {e}")
+            self.error(f"Error occurred during SuccessTask: {e}")
+            return None
+
+    def save_tasks(self, tasks: set[int]) -> None:
+        storage.update_state(self.session_name, completed_tasks=tasks - {SIGN_TASK_ID})
+
+    async def doTask(self, http_client: aiohttp.ClientSession, num: int, semaphore: asyncio.Semaphore,
+                     tasks: set[int]) -> bool:
+        async with semaphore:
+            random_delay = random.randint(2, 5)
+            self.info("开始做任务:<light-red>{}</light-red>,随机延迟<light-red>{}s</light-red>", num, random_delay)
+            await asyncio.sleep(delay=random_delay)
+            try:
+                resp = await self.request(http_client, 'POST', f"{settings.API_URL}/api/User/DoTask/{num}",
+                                          endpoint='User/DoTask', json={}, ssl=False)
+                task_response = await response_decoder.read(resp, DoTaskResponse)
+                if task_response.code == 200:
+                    self.info("<light-red>{}</light-red>任务完成!", num)
+                    tasks.add(num)
+                    self.save_tasks(tasks)
+                    return True
+            except Exception as error:
+                self.error("{}做任务失败! Unknown error: {}", num, error)
+            return False
 
-    async def makeTask(self, http_client, tasks):
-        taskList = [ 1, 3, 5, 4, 12, 13, 10, 9, 11, 17, 14, 15, 16, 6, 7, 18, 19, 20, 22, 21, 28, 29, 26, 27, 24, 25, 37, 38, 39, 40, 30, 31, 33, 32, 34, 35, 36]
-        for num in taskList:
-            if not num in tasks:
-                random_delay = random.randint(2, 5)
-                logger.info(
-                    f"{self.tg_client.name} |开始做任务:<light-red>{num}</light-red>,随机延迟<light-red>{random_delay}s</light-red>")
-                await asyncio.sleep(delay=random_delay)
-                try:
-                    resp = await http_client.post(f"https://api.tonpepes.xyz/api/User/DoTask/{num}", json={}, ssl=False)
-                    task_json = await resp.json()
-                    if task_json.get('code') == 200:
-                        logger.info(f"{self.tg_client.name} |<light-red>{num}</light-red>任务完成!")
-                except Exception as error:
-                    logger.error(
-                        f"{num}做任务失败!<light-yellow>{self.session_name}</light-yellow> | Unknown error: {error}")
-
-    async def sign(self, http_client, tasks):
-        await http_client.get(f"https://api.tonpepes.xyz/api/User/LoginAward1/177", ssl=False)
-        if 177 not in tasks:
-            resp = await http_client.post(f"https://api.tonpepes.xyz/api/User/DoTask/177", json={}, ssl=False)
-            await resp.json()
-
-
-async def run_tapper(tg_client: Client, proxy: str | None):
+    async def makeTask(self, http_client, tasks: set[int]) -> dict[int, bool]:
+        pending = [num for num in TASK_IDS if num not in tasks]
+        semaphore = asyncio.Semaphore(settings.TASK_CONCURRENCY)
+
+        results = await asyncio.gather(*(self.doTask(http_client=http_client, num=num, semaphore=semaphore,
+                                                     tasks=tasks)
+                                         for num in pending))
+
+        return dict(zip(pending, results))
+
+    async def sign(self, http_client, tasks) -> bool:
+        await self.request(http_client, 'GET', f"{settings.API_URL}/api/User/LoginAward1/{SIGN_TASK_ID}",
+                           endpoint='User/LoginAward1', discard=True, ssl=False)
+        if SIGN_TASK_ID not in tasks:
+            resp = await self.request(http_client, 'POST', f"{settings.API_URL}/api/User/DoTask/{SIGN_TASK_ID}",
+                                      endpoint='User/DoTask', json={}, ssl=False)
+            task_response = await response_decoder.read(resp, DoTaskResponse)
+            return task_response.code == 200
+        return False
+
+
+async def run_tapper(session: SessionDescriptor) -> float | None:
     try:
-        await Tapper(tg_client=tg_client).run(proxy=proxy)
+        next_run = await Tapper(session=session).run(proxy=session.proxy)
     except InvalidSession:
-        logger.error(f"{tg_client.name} | Invalid Session")
+        logger.error(f"{session.name} | Invalid Session")
+        storage.update_manifest(session.name, valid=False, reason="InvalidSession", revoked=1)
+        return None
+    except RescheduleSession as reschedule:
+        next_run = reschedule.delay + random.uniform(1, 10)
+        logger.info(f"{session.name} | Paused, next cycle in <light-red>{format_duration(int(next_run))}</light-red>")
+
+    if next_run is not None:
+        storage.update_state(session.name, next_due_at=time.time() + next_run)
+
+    return next_run
@@ -0,0 +1,74 @@
+import asyncio
+import base64
+import json
+import time
+from typing import Awaitable, Callable
+
+from bot.config import settings
+from .storage import storage
+
+
+def decode_expiry(token: str) -> float | None:
+    """Return the ``exp`` claim of a JWT, or None if the token is not a JWT."""
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(claims['exp'])
+    except (IndexError, ValueError, KeyError, TypeError):
+        return None
+
+
+class TokenCache:
+    """Per-session bearer tokens reused until shortly before they expire.
+
+    Tokens are kept in memory and mirrored to ``session_state`` so they also
+    survive restarts. ``get_or_refresh`` is single-flight: concurrent callers
+    for one session wait for the same login instead of starting their own.
+    """
+
+    def __init__(self, refresh_margin: float, default_ttl: float):
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self._tokens: dict[str, tuple[str, float]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def get(self, session_name: str) -> str | None:
+        entry = self._tokens.get(session_name)
+        if entry is None:
+            state = storage.get_state(session_name) or {}
+            if state.get('access_token') and state.get('token_expires_at'):
+                entry = self._tokens[session_name] = (state['access_token'], state['token_expires_at'])
+
+        if entry is None or entry[1] - self.refresh_margin <= time.time():
+            return None
+        return entry[0]
+
+    def set(self, session_name: str, token: str) -> None:
+        expires_at = decode_expiry(token) or time.time() + self.default_ttl
+        self._tokens[session_name] = (token, expires_at)
+        storage.update_state(session_name, access_token=token, token_expires_at=expires_at)
+
+    def invalidate(self, session_name: str) -> None:
+        self._tokens.pop(session_name, None)
+        storage.update_state(session_name, access_token=None, token_expires_at=None)
+
+    async def get_or_refresh(self, session_name: str, refresh: Callable[[], Awaitable[str | None]]) -> str | None:
+        token = self.get(session_name)
+        if token is not None:
+            return token
+
+        lock = self._locks.get(session_name)
+        if lock is None:
+            lock = self._locks[session_name] = asyncio.Lock()
+
+        async with lock:
+            # Another coroutine may have logged in while we were waiting.
+            token = self.get(session_name)
+            if token is None:
+                token = await refresh()
+                if token:
+                    self.set(session_name, token)
+            return token
+
+
+token_cache = TokenCache(refresh_margin=settings.TOKEN_REFRESH_MARGIN, default_ttl=settings.TOKEN_DEFAULT_TTL)
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from bot.utils import logger
+from .agents import generate_random_user_agent
+from .helper import atomic_json_update
+
+USER_AGENTS_FILE = "user_agents.json"
+FLUSH_DELAY = 1.0
+
+
+class UserAgentStore:
+    """Process-wide session name -> user agent mapping backed by ``user_agents.json``.
+
+    The file is read once; new entries are batched and written back with a
+    single atomic replace instead of a full rewrite per session.
+    """
+
+    def __init__(self, file_name: str = USER_AGENTS_FILE):
+        self.file_name = file_name
+        self._agents: dict[str, str] | None = None
+        self._dirty = False
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def agents(self) -> dict[str, str]:
+        if self._agents is None:
+            self._agents = self._load()
+        return self._agents
+
+    def _load(self, quiet: bool = False) -> dict[str, str]:
+        try:
+            with open(self.file_name, 'r') as user_agents:
+                session_data = json.load(user_agents)
+        except FileNotFoundError:
+            if not quiet:
+                logger.warning("User agents file not found, creating...")
+            return {}
+        except json.JSONDecodeError:
+            if not quiet:
+                logger.warning("User agents file is empty or corrupted.")
+            return {}
+
+        return self._parse(session_data)
+
+    @staticmethod
+    def _parse(session_data) -> dict[str, str]:
+        if not isinstance(session_data, list):
+            return {}
+
+        return {session['session_name']: session['user_agent'] for session in session_data
+                if isinstance(session, dict) and 'session_name' in session and 'user_agent' in session}
+
+    def get(self, session_name: str) -> str | None:
+        return self.agents.get(session_name)
+
+    def get_or_create(self, session_name: str) -> str:
+        user_agent = self.agents.get(session_name)
+        if user_agent is not None:
+            return user_agent
+
+        user_agent = generate_random_user_agent()
+        self.agents[session_name] = user_agent
+        self._dirty = True
+        self.flush_soon()
+
+        logger.success(f"<light-yellow>{session_name}</light-yellow> | User agent saved successfully")
+
+        return user_agent
+
+    def ensure(self, session_names: list[str]) -> None:
+        agents = self.agents
+        for session_name in session_names:
+            if session_name not in agents:
+                agents[session_name] = generate_random_user_agent()
+                self._dirty = True
+        self.flush()
+
+    def flush_soon(self) -> None:
+        if self._flush_handle is not None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+
+        self._flush_handle = loop.call_later(FLUSH_DELAY, self.flush)
+
+    def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._dirty:
+            return
+
+        def merge(session_data):
+            # Other worker processes may have added sessions since we loaded the file.
+            for session_name, user_agent in self._parse(session_data).items():
+                self.agents.setdefault(session_name, user_agent)
+
+            return [{'session_name': session_name, 'user_agent': user_agent}
+                    for session_name, user_agent in self.agents.items()]
+
+        atomic_json_update(self.file_name, merge, indent=4)
+        self._dirty = False
+
+
+user_agents = UserAgentStore()
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import time
+
+from bot.config import settings
+from bot.exceptions import RescheduleSession
+from bot.utils import logger
+from .client_pool import client_pool
+from .rpc import rpc_governor
+from .sessions import SessionDescriptor
+from .storage import storage
+
+AUTH_KEY_SIZE = 256
+
+
+def inspect_session_file(path: str) -> dict:
+    """Read the auth key and DC straight from a Pyrogram session file without starting a client."""
+    try:
+        stat = os.stat(path)
+    except OSError as error:
+        return dict(valid=False, reason=f"unreadable: {error.strerror}")
+
+    result = dict(file_size=stat.st_size, file_mtime=stat.st_mtime, dc_id=None, user_id=None, auth_key_hash=None)
+    try:
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = connection.execute("SELECT dc_id, auth_key, user_id FROM sessions LIMIT 1").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.DatabaseError as error:
+        return dict(result, valid=False, reason=f"not a session database: {error}")
+
+    if row is None:
+        return dict(result, valid=False, reason="no session row")
+
+    dc_id, auth_key, user_id = row
+    result.update(dc_id=dc_id, user_id=user_id, auth_key_hash=hashlib.sha1(auth_key).hexdigest() if auth_key else None)
+    if not dc_id:
+        return dict(result, valid=False, reason="missing DC")
+    if not auth_key or len(auth_key) != AUTH_KEY_SIZE:
+        return dict(result, valid=False, reason="missing auth key")
+    return dict(result, valid=True, reason=None)
+
+
+def record_session(session_name: str, path: str, authorized: bool = False) -> dict:
+    """Inspect ``path`` and store the result in the session manifest."""
+    entry = inspect_session_file(path)
+    entry["checked_at"] = time.time()
+    if authorized and entry["valid"]:
+        entry["authorized_at"] = entry["checked_at"]
+        entry["revoked"] = 0
+    storage.update_manifest(session_name, **entry)
+    return entry
+
+
+async def check_authorization(session: SessionDescriptor,
+                              semaphore: asyncio.Semaphore) -> tuple[bool | None, str | None]:
+    """One ``get_me`` call through the shared client pool.
+
+    Returns ``(True, None)`` when confirmed, ``(False, reason)`` when Telegram
+    rejects the session and ``(None, None)`` when the check itself failed.
+    """
+    from pyrogram.errors import AuthKeyUnregistered, Unauthorized, UserDeactivated
+
+    async with semaphore:
+        try:
+            async with client_pool.connection(session=session, proxy=session.pyrogram_proxy()) as tg_client:
+                await rpc_governor.call(session.name, tg_client, 'get_me', tg_client.get_me)
+        except (Unauthorized, UserDeactivated, AuthKeyUnregistered) as error:
+            return False, type(error).__name__
+        except RescheduleSession:
+            return None, None
+        except Exception as error:
+            # Network trouble says nothing about the session itself; it stays unconfirmed and is checked next start.
+            logger.warning(f"{session.name} | Authorization check failed: {error}")
+            return None, None
+    return True, None
+
+
+def _keep_valid(sessions: list[SessionDescriptor], manifest: dict[str, dict]) -> list[SessionDescriptor]:
+    valid = []
+    for session in sessions:
+        entry = manifest[session.name]
+        if entry["valid"]:
+            valid.append(session)
+        else:
+            logger.warning(f"{session.name} | Skipping invalid session: {entry['reason']}")
+    return valid
+
+
+async def validate_sessions(sessions: list[SessionDescriptor]) -> list[SessionDescriptor]:
+    """Drop sessions whose files have no usable auth key or DC.
+
+    Files are read in worker threads. Results are cached in the
+    ``session_manifest`` table and only recomputed when a session file's size
+    or modification time changes.
+    """
+    manifest = storage.get_manifest()
+    stale = []
+    for session in sessions:
+        entry = manifest.get(session.name)
+        try:
+            stat = os.stat(session.path)
+        except OSError:
+            stale.append(session)
+            continue
+        if entry is None or entry["file_size"] != stat.st_size or entry["file_mtime"] != stat.st_mtime:
+            stale.append(session)
+
+    if stale:
+        entries = await asyncio.gather(*(asyncio.to_thread(inspect_session_file, session.path) for session in stale))
+        now = time.time()
+        for session, entry in zip(stale, entries):
+            previous = manifest.get(session.name)
+            entry["checked_at"] = now
+            # Pyrogram VACUUMs the file on every connect; a Telegram rejection only ends with a new auth key.
+            # Rows from before auth keys were hashed have none, and count as the same key.
+            if previous and previous["revoked"] and previous["auth_key_hash"] in (None, entry.get("auth_key_hash")):
+                entry.update(valid=False, reason=previous["reason"])
+            else:
+                entry["revoked"] = 0
+            # Pyrogram rewrites the file while it runs; only a previously bad session needs confirming again.
+            if not (previous and previous["valid"] and entry["valid"]):
+                entry["authorized_at"] = None
+            storage.update_manifest(session.name, **entry)
+            manifest[session.name] = dict(previous or {}, **entry)
+
+    valid = _keep_valid(sessions, manifest)
+    logger.info(f"Session check: {len(valid)} valid | {len(sessions) - len(valid)} invalid")
+
+    return valid
+
+
+async def authorize_sessions(sessions: list[SessionDescriptor]) -> list[SessionDescriptor]:
+    """Confirm sessions not confirmed within ``SESSION_AUTH_TTL`` with one ``get_me`` each.
+
+    Run after proxies are assigned so the check goes through the session's own proxy.
+    """
+    manifest = storage.get_manifest()
+    expired = time.time() - settings.SESSION_AUTH_TTL
+    unconfirmed = [session for session in sessions if (manifest[session.name]["authorized_at"] or 0) < expired]
+
+    semaphore = asyncio.Semaphore(settings.SESSION_AUTH_CONCURRENCY)
+    results = await asyncio.gather(*(check_authorization(session, semaphore) for session in unconfirmed))
+    now = time.time()
+    unknown = 0
+    for session, (authorized, reason) in zip(unconfirmed, results):
+        if authorized is None:
+            # Only a confirmed get_me is stamped, so an unreachable session is checked again next time.
+            unknown += 1
+            continue
+        fields = dict(authorized_at=now) if authorized else dict(valid=False, reason=reason, revoked=1)
+        storage.update_manifest(session.name, **fields)
+        manifest[session.name].update(fields)
+
+    valid = _keep_valid(sessions, manifest)
+    if unconfirmed:
+        logger.info(f"Authorization check: {len(unconfirmed)} checked | {len(sessions) - len(valid)} revoked"
+                    + (f" | {unknown} unreachable" if unknown else ""))
+
+    return valid
@@ -1,2 +1,11 @@
 class InvalidSession(BaseException):
     ...
+
+
+class RescheduleSession(BaseException):
+    """Stop the current cycle and run the session again after ``delay`` seconds."""
+
+    def __init__(self, session_name: str, delay: float):
+        super().__init__(session_name, delay)
+        self.session_name = session_name
+        self.delay = delay
@@ -1,16 +1,29 @@
 import argparse
 import asyncio
 import glob
+import heapq
 import os
-from itertools import cycle
-
-from better_proxy import Proxy
-from pyrogram import Client
+import random
+import time
 
 from bot.config import settings
+from bot.core.client_pool import client_pool
+from bot.core.connections import connector_pool
+from bot.core.helper import format_duration
+from bot.core.proxies import iter_proxies, proxy_manager
+from bot.core.ratelimit import rate_limiter
+from bot.core.recording import recorder
 from bot.core.registrator import register_sessions
+from bot.core.rpc import rpc_governor
+from bot.core.scheduler import Scheduler
+from bot.core.sessions import SessionDescriptor
+from bot.core.storage import storage
 from bot.core.tapper import run_tapper
+from bot.core.user_agents import user_agents
+from bot.core.validation import authorize_sessions, validate_sessions
 from bot.utils import logger
+from bot.utils.metrics import metrics
+from bot.utils.supervisor import Supervisor
 
 start_text = """
 ██████╗ ██╗     ██╗   ██╗███╗   ███╗████████╗ ██████╗ ██████╗  ██████╗ ████████╗
@@ -26,8 +39,6 @@ Select an action:
     2. Create session
 """
 
-global tg_clients
-
 
 def get_session_names() -> list[str]:
     session_names = sorted(glob.glob("sessions/*.session"))
@@ -38,19 +49,16 @@ def get_session_names() -> list[str]:
     return session_names
 
 
-def get_proxies() -> list[Proxy]:
+def get_proxies() -> list[str]:
     if settings.USE_PROXY_FROM_FILE:
-        with open(file="bot/config/proxies.txt", encoding="utf-8-sig") as file:
-            proxies = [Proxy.from_str(proxy=row.strip()).as_url for row in file]
+        proxies = list(iter_proxies())
     else:
         proxies = []
 
     return proxies
 
 
-async def get_tg_clients() -> list[Client]:
-    global tg_clients
-
+def get_sessions() -> list[SessionDescriptor]:
     session_names = get_session_names()
 
     if not session_names:
@@ -59,27 +67,50 @@ async def get_tg_clients() -> list[Client]:
     if not settings.API_ID or not settings.API_HASH:
         raise ValueError("API_ID and API_HASH not found in the .env file.")
 
-    tg_clients = [
-        Client(
-            name=session_name,
-            api_id=settings.API_ID,
-            api_hash=settings.API_HASH,
-            workdir="sessions/",
-            plugins=dict(root="bot/plugins"),
-        )
-        for session_name in session_names
-    ]
+    # Proxies are assigned in prepare_sessions once they have been health checked.
+    return [SessionDescriptor(name=session_name) for session_name in session_names]
+
+
+def shard_sessions(sessions: list[SessionDescriptor], workers: int) -> list[list[SessionDescriptor]]:
+    """Split sessions into ``workers`` balanced shards, keeping sessions that share a proxy together.
+
+    A proxy's sessions then share one worker's connector and health check.
+    Groups larger than a fair share are split so one busy proxy cannot
+    leave the other workers idle.
+    """
+    fair_share = -(-len(sessions) // workers)
+    groups: dict[str | None, list[SessionDescriptor]] = {}
+    for session in sessions:
+        groups.setdefault(session.proxy, []).append(session)
 
-    return tg_clients
+    # Sessions without a proxy have nothing to share, so they are placed one by one.
+    units = [[session] for session in groups.pop(None, [])]
+    for group in groups.values():
+        units += [group[start:start + fair_share] for start in range(0, len(group), fair_share)]
+
+    shards = [[] for _ in range(workers)]
+    heap = [(0, index) for index in range(workers)]
+    for unit in sorted(units, key=len, reverse=True):
+        size, index = heapq.heappop(heap)
+        shards[index] += unit
+        heapq.heappush(heap, (size + len(unit), index))
+
+    return [shard for shard in shards if shard]
 
 
 async def process() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("-a", "--action", type=int, help="Action to perform")
+    parser.add_argument("-w", "--workers", type=int, default=settings.WORKERS,
+                        help="Number of worker processes for the clicker")
+    parser.add_argument("--shard", help=argparse.SUPPRESS)
 
-    logger.info(f"Detected {len(get_session_names())} sessions | {len(get_proxies())} proxies")
+    args = parser.parse_args()
+    action = args.action
+    proxies = get_proxies()
 
-    action = parser.parse_args().action
+    if not args.shard:
+        logger.info(f"Detected {len(get_session_names())} sessions | {len(proxies)} proxies")
 
     if not action:
         print(start_text)
@@ -96,25 +127,93 @@ async def process() -> None:
                 break
 
     if action == 1:
-        tg_clients = await get_tg_clients()
-
-        await run_tasks(tg_clients=tg_clients)
+        if args.shard:
+            # The supervisor has already validated the sessions and assigned proxies.
+            index, workers = map(int, args.shard.split("/"))
+            logger.configure(extra={"worker": index})
+            rate_limiter.set_share(1 / workers)
+            rpc_governor.set_share(1 / workers)
+            sessions = [SessionDescriptor(name=name, proxy=proxy) for name, proxy in storage.get_shard(index)]
+            await run_tasks(sessions=sessions)
+            return
+
+        sessions = await prepare_sessions(sessions=get_sessions(), proxies=proxies)
+
+        if args.workers > 1 and len(sessions) > 1:
+            shards = shard_sessions(sessions, workers=min(args.workers, len(sessions)))
+            storage.set_shards([[(session.name, session.proxy) for session in shard] for shard in shards])
+            # Workers open the same session files and connectors; release ours before they start.
+            await client_pool.close()
+            await connector_pool.close()
+            storage.close()
+            await Supervisor(workers=len(shards)).run()
+        else:
+            await run_tasks(sessions=sessions)
 
     elif action == 2:
         await register_sessions()
 
 
-async def run_tasks(tg_clients: list[Client]):
-    proxies = get_proxies()
-    proxies_cycle = cycle(proxies) if proxies else None
-    tasks = [
-        asyncio.create_task(
-            run_tapper(
-                tg_client=tg_client,
-                proxy=next(proxies_cycle) if proxies_cycle else None,
-            )
-        )
-        for tg_client in tg_clients
-    ]
-
-    await asyncio.gather(*tasks)
+async def prepare_sessions(sessions: list[SessionDescriptor], proxies: list[str]) -> list[SessionDescriptor]:
+    """Validate sessions and assign health-checked proxies once, before any worker starts."""
+    user_agents.ensure([session.name for session in sessions])
+
+    sessions = await validate_sessions(sessions)
+
+    assignment = await proxy_manager.assign([session.name for session in sessions], proxies)
+    for session in sessions:
+        session.proxy = assignment[session.name]
+
+    if settings.SESSION_AUTH_CHECK:
+        sessions = await authorize_sessions(sessions)
+
+    return sessions
+
+
+async def run_tasks(sessions: list[SessionDescriptor]):
+    scheduler = Scheduler(runner=run_tapper, max_concurrent=settings.MAX_CONCURRENT_SESSIONS)
+
+    due_times = storage.get_due_times()
+    now = time.time()
+    starting = []
+
+    for session in sessions:
+        due_at = due_times.get(session.name)
+        if due_at is not None and due_at > now:
+            delay = due_at - now
+            logger.info(f"{session.name} | Not due yet, "
+                        f"next cycle in <light-red>{format_duration(int(delay))}</light-red>")
+            scheduler.schedule(session, delay=delay)
+        else:
+            starting.append(session)
+
+    # Sessions due now start evenly across the START_DELAY window instead of bunching up.
+    random.shuffle(starting)
+    delays = scheduler.stagger(starting, *settings.START_DELAY)
+    for session, delay in zip(starting, delays):
+        logger.info(f"{session.name} | Bot will start in <light-red>{delay:.1f}s</light-red>")
+
+    metrics_runner = None
+    if settings.METRICS_PORT:
+        metrics_runner = await metrics.serve(host=settings.METRICS_HOST, port=settings.METRICS_PORT)
+        logger.info(f"Metrics available at http://{settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics")
+
+    metrics_dumper = None
+    if settings.METRICS_FILE:
+        metrics_dumper = asyncio.create_task(
+            metrics.dump_periodically(file_name=settings.METRICS_FILE, interval=settings.METRICS_INTERVAL))
+
+    try:
+        await scheduler.run()
+    finally:
+        user_agents.flush()
+        recorder.flush()
+        await connector_pool.close()
+        await client_pool.close()
+        storage.close()
+
+        if metrics_dumper is not None:
+            metrics_dumper.cancel()
+            metrics.dump(settings.METRICS_FILE)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
@@ -1,11 +1,54 @@
+import json
 import sys
 from loguru import logger
 
+from bot.config import settings
 
-logger.remove()
-logger.add(sink=sys.stdout, format="<white>{time:YYYY-MM-DD HH:mm:ss}</white>"
-                                   " | <level>{level}</level>"
-                                   " | <white><b>{message}</b></white>")
+CONSOLE_FORMAT = ("<white>{time:YYYY-MM-DD HH:mm:ss}</white>"
+                  " | <level>{level}</level>"
+                  " | <white><b>{message}</b></white>")
+
+_min_level = 0
+_level_numbers: dict[str, int] = {}
+
+
+def json_sink(message) -> None:
+    record = message.record
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        **record["extra"],
+    }
+    if record["exception"] is not None:
+        payload["exception"] = str(record["exception"].value)
+
+    sys.stdout.write(json.dumps(payload, default=str, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def setup(log_format: str = "console", level: str = "INFO", enqueue: bool = True) -> None:
+    """(Re)configure the sink; ``enqueue`` moves formatting and writing to a background thread."""
+    global _min_level
+
+    logger.remove()
+    if log_format == "json":
+        logger.add(sink=json_sink, level=level, enqueue=enqueue)
+    else:
+        logger.add(sink=sys.stdout, format=CONSOLE_FORMAT, level=level, enqueue=enqueue)
+
+    _min_level = logger.level(level).no
+    _level_numbers.clear()
+
+
+def enabled(level: str) -> bool:
+    no = _level_numbers.get(level)
+    if no is None:
+        no = _level_numbers[level] = logger.level(level).no
+    return no >= _min_level
+
+
+setup(log_format=settings.LOG_FORMAT, level=settings.LOG_LEVEL, enqueue=settings.LOG_ENQUEUE)
 logger = logger.opt(colors=True)
 
 
@@ -30,4 +73,4 @@ def critical(text):
 
 
 def success(text):
-    return logger.success(text)
\ No newline at end of file
+    return logger.success(text)
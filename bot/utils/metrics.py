@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from collections import Counter
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Timer:
+    """Context manager timing one call; set ``status`` before leaving to record it."""
+
+    __slots__ = ("metrics", "kind", "endpoint", "status", "started")
+
+    def __init__(self, metrics: "Metrics", kind: str, endpoint: str):
+        self.metrics = metrics
+        self.kind = kind
+        self.endpoint = endpoint
+        self.status = None
+
+    def __enter__(self) -> "Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.metrics.observe(self.kind, self.endpoint, time.perf_counter() - self.started, status=self.status,
+                             error=exc_type.__name__ if exc_type is not None else None)
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in labels.items())
+
+
+class Metrics:
+    """Per-endpoint latency histograms and status/error counters in Prometheus text format."""
+
+    def __init__(self):
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.statuses: Counter[tuple[str, str, int]] = Counter()
+        self.errors: Counter[tuple[str, str, str]] = Counter()
+        self.counters: dict[str, tuple[str, str, Counter]] = {}
+
+    def timer(self, kind: str, endpoint: str) -> Timer:
+        return Timer(self, kind, endpoint)
+
+    def observe(self, kind: str, endpoint: str, seconds: float, status: int | None = None,
+                error: str | None = None) -> None:
+        histogram = self.latency.get((kind, endpoint))
+        if histogram is None:
+            histogram = self.latency[(kind, endpoint)] = Histogram()
+        histogram.observe(seconds)
+
+        if status is not None:
+            self.statuses[(kind, endpoint, status)] += 1
+        if error is not None:
+            self.errors[(kind, endpoint, error)] += 1
+
+    def register_counter(self, name: str, label: str, counter: Counter, description: str = "") -> None:
+        """Expose an existing ``Counter`` keyed by a single label."""
+        self.counters[name] = (label, description, counter)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP bot_request_duration_seconds Latency of HTTP and Telegram calls (kind=ratelimit: limiter waits).",
+            "# TYPE bot_request_duration_seconds histogram",
+        ]
+        for (kind, endpoint), histogram in sorted(self.latency.items()):
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+                cumulative += count
+                labels = _labels(kind=kind, endpoint=endpoint, le=bound)
+                lines.append(f"bot_request_duration_seconds_bucket{{{labels}}} {cumulative}")
+            labels = _labels(kind=kind, endpoint=endpoint)
+            lines.append(f"bot_request_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"bot_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += ["# HELP bot_responses_total Responses by status code.", "# TYPE bot_responses_total counter"]
+        for (kind, endpoint, status), count in sorted(self.statuses.items()):
+            lines.append(f"bot_responses_total{{{_labels(kind=kind, endpoint=endpoint, status=status)}}} {count}")
+
+        lines += ["# HELP bot_errors_total Calls that raised, by exception type.", "# TYPE bot_errors_total counter"]
+        for (kind, endpoint, error), count in sorted(self.errors.items()):
+            lines.append(f"bot_errors_total{{{_labels(kind=kind, endpoint=endpoint, error=error)}}} {count}")
+
+        for name, (label, description, counter) in sorted(self.counters.items()):
+            lines += [f"# HELP {name} {description}".rstrip(), f"# TYPE {name} counter"]
+            for key, count in sorted(counter.items()):
+                lines.append(f"{name}{{{_labels(**{label: key})}}} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, file_name: str, text: str | None = None) -> None:
+        tmp_file_name = f"{file_name}.tmp"
+        with open(tmp_file_name, "w") as file:
+            file.write(self.render() if text is None else text)
+        os.replace(tmp_file_name, file_name)
+
+    async def dump_periodically(self, file_name: str, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.dump(file_name)
+
+    async def serve(self, host: str, port: int, render=None):
+        from aiohttp import web
+
+        render = render or self.render
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(body=render().encode(),
+                                headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+
+        return runner
+
+
+metrics = Metrics()
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import re
+import sys
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+RESTART_DELAY = (1, 60)
+
+_FAMILY_RE = re.compile(r"^# (?:HELP|TYPE) (\S+)")
+_SAMPLE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (.*)$")
+
+
+def worker_metrics_file(index: int) -> str:
+    base = settings.METRICS_FILE or "metrics.prom"
+    return f"{base}.worker{index}"
+
+
+def merge_metrics(texts: dict[int, str]) -> str:
+    """Merge Prometheus text from several workers, adding a ``worker`` label to every sample."""
+    families: dict[str, tuple[list[str], list[str]]] = {}
+    for index, text in sorted(texts.items()):
+        family = None
+        for line in text.splitlines():
+            header = _FAMILY_RE.match(line)
+            if header:
+                family = header.group(1)
+                headers, _ = families.setdefault(family, ([], []))
+                if line not in headers:
+                    headers.append(line)
+                continue
+
+            sample = _SAMPLE_RE.match(line)
+            if not sample or family is None:
+                continue
+
+            name, labels, value = sample.groups()
+            labels = f'worker="{index}",{labels}' if labels else f'worker="{index}"'
+            families[family][1].append(f"{name}{{{labels}}} {value}")
+
+    lines = []
+    for headers, samples in families.values():
+        lines += headers + samples
+    return "\n".join(lines) + "\n"
+
+
+class Supervisor:
+    """Runs ``workers`` shard processes, restarting crashed ones and combining their logs and metrics."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.processes: dict[int, asyncio.subprocess.Process] = {}
+
+    def read_metrics(self) -> str:
+        texts = {}
+        for index in range(self.workers):
+            try:
+                with open(worker_metrics_file(index)) as file:
+                    texts[index] = file.read()
+            except FileNotFoundError:
+                continue
+        return merge_metrics(texts)
+
+    async def _forward_output(self, index: int, process: asyncio.subprocess.Process) -> None:
+        # JSON lines carry a "worker" field instead of a text prefix.
+        prefix = b"" if settings.LOG_FORMAT == "json" else f"[worker {index}] ".encode()
+        while line := await process.stdout.readline():
+            sys.stdout.buffer.write(prefix + line)
+            sys.stdout.buffer.flush()
+
+    async def run_worker(self, index: int) -> None:
+        metrics_file = worker_metrics_file(index) if settings.METRICS_PORT or settings.METRICS_FILE else ""
+        env = dict(os.environ, METRICS_PORT="0", METRICS_FILE=metrics_file)
+        if settings.HTTP_RECORD_FILE:
+            env["HTTP_RECORD_FILE"] = f"{settings.HTTP_RECORD_FILE}.worker{index}"
+        restart_delay = RESTART_DELAY[0]
+
+        while True:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, sys.argv[0], "-a", "1", "--shard", f"{index}/{self.workers}",
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, env=env,
+            )
+            self.processes[index] = process
+
+            try:
+                await self._forward_output(index=index, process=process)
+                code = await process.wait()
+            finally:
+                if process.returncode is None:
+                    process.terminate()
+                    await process.wait()
+
+            if code == 0:
+                logger.info(f"Worker {index} finished")
+                return
+
+            logger.error(f"Worker {index} exited with code {code}, restarting in {restart_delay}s")
+            await asyncio.sleep(restart_delay)
+            restart_delay = min(restart_delay * 2, RESTART_DELAY[1])
+
+    async def _serve_metrics(self) -> None:
+        while True:
+            await asyncio.sleep(settings.METRICS_INTERVAL)
+            if settings.METRICS_FILE:
+                metrics.dump(settings.METRICS_FILE, text=self.read_metrics())
+
+    async def run(self) -> None:
+        metrics_runner = None
+        if settings.METRICS_PORT:
+            metrics_runner = await metrics.serve(host=settings.METRICS_HOST, port=settings.METRICS_PORT,
+                                                 render=self.read_metrics)
+            logger.info(f"Metrics available at http://{settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics")
+
+        metrics_writer = asyncio.create_task(self._serve_metrics())
+        try:
+            await asyncio.gather(*(self.run_worker(index) for index in range(self.workers)))
+        finally:
+            metrics_writer.cancel()
+            if settings.METRICS_FILE:
+                metrics.dump(settings.METRICS_FILE, text=self.read_metrics())
+            if metrics_runner is not None:
+                await metrics_runner.cleanup()